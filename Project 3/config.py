@@ -3,6 +3,7 @@ TIMESTEPS = 20
 GRID = {
     'Rows': 10,
     'Cols': 10,
+    'Torus': False,     # Neighborhoods wrap around the edges of the grid
 }
 
 POPULATION = {
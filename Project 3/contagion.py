@@ -2,25 +2,54 @@
 
 import config     # edit config.py any parameters as desired
 import model
+import recorder
+import streams
 import views
 
+import argparse
 import logging
 
+try:
+    import vector_model     # needs NumPy
+except ImportError:
+    vector_model = None
+
 # Set up logging (use as you did in Lab3 instead of debug print() statements)
 logging.basicConfig()
 log = logging.getLogger(__name__)
 log.setLevel(logging.DEBUG)
 
 
+# Population classes that can run the simulation
+ENGINES = {'objects': model.Population}
+if vector_model is not None:
+    ENGINES['arrays'] = vector_model.ArrayPopulation
+
+
 class Controller:
-    def __init__(self):
-        pass
+    def __init__(self, engine: str = 'objects', record: str = None, snapshots: bool = False,
+                 seed: int = None):
+        """Args:
+            engine: which population class to simulate with, a key of ENGINES
+            record: file to save the run's per-step counts to (.csv, .npz
+                or .parquet), if any
+            snapshots: also record the state of every cell
+            seed: random seed, to repeat an earlier run (by default a new one,
+                which is logged)
+        """
+        self.population_class = ENGINES[engine]
+        self.record = record
+        self.snapshots = snapshots
+        self.seed = seed
     
     def run(self):
         
-        population = model.Population(config.GRID['Rows'], 
-                                      config.GRID['Cols'],
-                                      num_people=config.POPULATION['N_People'])
+        rng = streams.RandomStream(self.seed)
+        log.info(f"Random seed {rng.entropy}")
+        population = self.population_class(config.GRID['Rows'], 
+                                           config.GRID['Cols'],
+                                           num_people=config.POPULATION['N_People'],
+                                           rng=rng)
         view = views.TextView(delay=0.5)    # make the delay smaller for faster output
         
         # Have the view monitor model events    
@@ -31,6 +60,8 @@ class Controller:
         
         log.info("Seeding")
         population.seed(num_sick = config.POPULATION['N_Infected'])
+        if self.record:
+            history = recorder.Recorder(population, snapshots=self.snapshots)
         
         view.update()
         
@@ -49,6 +80,26 @@ class Controller:
             # Advance time
             population.tick()
 
+        if self.record:
+            history.save(self.record)
+
         
+def cli() -> argparse.Namespace:
+    """Get arguments from the command line"""
+    parser = argparse.ArgumentParser(description="Simple cellular automata model of contagion")
+    parser.add_argument("-e", "--engine", choices=sorted(ENGINES), default="objects",
+                        help="objects: one Individual per person; "
+                             "arrays: NumPy arrays, for large grids")
+    parser.add_argument("-r", "--record", metavar="PATH",
+                        help="Save per-step S/I/R/D counts to a .csv, .npz or .parquet file")
+    parser.add_argument("-s", "--snapshots", action="store_true",
+                        help="With --record, also save every cell's state (delta-encoded)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Random seed, to repeat an earlier run")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    Controller().run()
\ No newline at end of file
+    args = cli()
+    Controller(engine=args.engine, record=args.record, snapshots=args.snapshots,
+               seed=args.seed).run()
\ No newline at end of file
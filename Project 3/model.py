@@ -1,9 +1,9 @@
 import enum
-import random
 import observer
 import config
+import streams
 
-from typing import List
+from typing import Callable, Dict, List, Optional, Sequence
 
 import logging
 
@@ -26,9 +26,10 @@ class Health(enum.Enum):
     DEAD = enum.auto()
         
     @staticmethod
-    def get_random() -> "Health":
-        """Returns a random enumerated element"""
-        return Health(random.randint(0, len(Health) - 1))
+    def get_random(rng: streams.RandomStream) -> "Health":
+        """Returns a random enumerated element, drawn from rng (e.g., a
+        population's stream)"""
+        return list(Health)[int(rng.random() * len(Health))]
 
     def __str__(self) -> str:
         """Return a string representation of the health state"""
@@ -42,6 +43,10 @@ class Individual(observer.Observable):
     is observable so that other objects (e.g., the controller or view) can be notified
     when an individual changes state, e.g., becomes sick or recovers."""
     
+    # Populations can hold close to a million individuals; without a
+    # per-instance __dict__ they are smaller and faster to create
+    __slots__ = ('_state', '_next_state', '_row', '_col', '_time_in_state', 'config')
+    
     def __init__(self, location: tuple):
         """Initialize each individual with a location. By default, the health
         state is Health.SUSCEPTIBLE.
@@ -77,6 +82,10 @@ class Individual(observer.Observable):
         """Returns the health state of the individual."""
         return self._state
     
+    def get_location(self) -> tuple:
+        """Returns the (row, col) of the individual's cell"""
+        return (self._row, self._col)
+    
     def set_next_state(self, health: Health):
         """Sets the next state of the individual"""
         self._next_state = health
@@ -94,7 +103,7 @@ class Individual(observer.Observable):
             if self._time_in_state > self.config['T_Recover']:
                 log.debug(f"Recovery at {self._row},{self._col}")
                 self._next_state = Health.RECOVERED
-            elif random.random() < self.config['P_Death']:
+            elif region.rng.random() < self.config['P_Death']:
                 log.debug(f"Death at {self._row},{self._col}")
                 self._next_state = Health.DEAD
 
@@ -109,7 +118,8 @@ class Individual(observer.Observable):
         self._time_in_state += 1
         if self._state != self._next_state:
             self._state = self._next_state
-            self.notify_all("newstate")
+            if self.has_observers():
+                self.notify_all("newstate")
             # Reset clock
             self._time_in_state = 0
             
@@ -124,51 +134,108 @@ class Individual(observer.Observable):
         Args:
             region: the population of individuals to which this individual belongs
         """
-        for coord in region.get_neighbors((self._row, self._col), 1):
-            a_neighbor = region.get_individual(coord[0], coord[1])
-            num_visits = config.SOCIAL['N_Visits']   # number of visits per step
-            while num_visits > 0:       # feel like this is wrong
-                if num_visits >= 1:
-                    p = random.random()
-                    if p < config.SOCIAL['P_Visits']:
-                        if hello() == True:
-                            self.meet(a_neighbor)
-                            num_visits -= 1
-                        else:
-                            pass    # neighbor did not want to meet
-                    else:
-                        pass        # you don't visit the neighbor
-            
+        if self.get_health() == Health.DEAD:
+            return
+        social = config.SOCIAL
+        # N_Visits is visits per neighbor per step; a fractional part is
+        # the chance of one more visit (0.33 is about 1 visit every 3 steps)
+        rng = region.rng
+        whole_visits = int(social['N_Visits'])
+        p_extra_visit = social['N_Visits'] - whole_visits
+        for a_neighbor in region.neighbors_of(self):
+            num_visits = whole_visits + (rng.random() < p_extra_visit)
+            for _ in range(num_visits):
+                if rng.random() < social['P_Visit'] and a_neighbor.hello(self, rng):
+                    self.meet(a_neighbor, rng)
 
-    def hello(self, visitor: "Individual") -> bool:
+
+    def hello(self, visitor: "Individual", rng: streams.RandomStream) -> bool:
         """True means 'welcome' and False means 'go away'"""
-        p = random.random()
+        p = rng.random()
         if p < config.SOCIAL['P_Greet']:
             return True     # individual is being welcomed into neighbor's home
         else:
             return False    # individual is being turned away
         
-    def meet(self, other: "Individual"):
+    def meet(self, other: "Individual", rng: streams.RandomStream):
         """Two individuals meet.  Either may infect
-        the other.
+        the other, if the other is susceptible.
         """
-        p = random.random()
+        p = rng.random()
         if p < config.DISEASE['P_Transmit']:
-            if other.get_health() == Health.INFECTED:
-                Individual.set_next_state(Health.INFECTED)
-            elif Individual.get_health() == Health.INFECTED:
+            if other.get_health() == Health.INFECTED and self.get_health() == Health.SUSCEPTIBLE:
+                self.set_next_state(Health.INFECTED)
+            elif self.get_health() == Health.INFECTED and other.get_health() == Health.SUSCEPTIBLE:
                 other.set_next_state(Health.INFECTED)
             else:
                 pass
 #----------------------------------------------------------------
 
+class NeighborIndex:
+    """The occupied cells within a fixed (Chebyshev) distance of each cell of
+    a population grid. The offsets are computed once; the neighbors of a cell
+    are looked up the first time they are asked for and then cached, since a
+    simulation only ever asks about the cells an outbreak reaches.
+    """
+    def __init__(self, occupied: Sequence[int], num_cols: int, max_dist: int,
+                 person: Callable[[int], Individual], torus: bool = False):
+        """Args:
+            occupied: for each cell (row * num_cols + col), whether anyone is in it
+            num_cols: the width of the grid
+            max_dist: how many steps away neighbors may be
+            person: gives the Individual in an occupied cell
+            torus: wrap around the edges of the grid instead of stopping at them
+        """
+        self._occupied = occupied
+        self._person = person
+        self._ncols = num_cols
+        self._nrows = len(occupied) // num_cols if num_cols else 0
+        self.max_dist = max_dist
+        self.torus = torus
+        self.offsets = [(drow, dcol)
+                        for drow in range(-max_dist, max_dist + 1)
+                        for dcol in range(-max_dist, max_dist + 1)
+                        if (drow, dcol) != (0, 0)]
+        self._cache: Dict[tuple, tuple] = {}
+
+    def coords(self, row: int, col: int) -> List[tuple]:
+        """(row, col) of every neighbor of the cell, in row-major order"""
+        if self.torus:
+            # A dict drops the repeats that wrapping a small grid can produce
+            cells = dict.fromkeys(((row + drow) % self._nrows, (col + dcol) % self._ncols)
+                                  for drow, dcol in self.offsets)
+            cells.pop((row, col), None)
+            return [(i, j) for i, j in cells if self._occupied[i * self._ncols + j]]
+        dist, occupied, ncols = self.max_dist, self._occupied, self._ncols
+        return [(i, j)
+                for i in range(max(0, row - dist), min(self._nrows, row + dist + 1))
+                for j in range(max(0, col - dist), min(ncols, col + dist + 1))
+                if occupied[i * ncols + j] and (i, j) != (row, col)]
+
+    def people(self, row: int, col: int) -> tuple:
+        """The neighboring Individuals of the cell"""
+        neighbors = self._cache.get((row, col))
+        if neighbors is None:
+            neighbors = tuple(self._person(i * self._ncols + j) for i, j in self.coords(row, col))
+            self._cache[(row, col)] = neighbors
+        return neighbors
+
+#----------------------------------------------------------------
+
 class Population(observer.Observable):
     """A model for the population based on a grid of cells, where each cell can hold
     a single Individual object. The population is observable, so that the view can
     get notified of changes to the population and update its visualization.
     
+    Only infected individuals and the susceptible ones within Visit_Dist of them
+    (the active set) can change state, so step() and tick() visit just those.
+    Everyone else keeps their state, and their clock, until an infection comes
+    within reach. For the same reason an Individual is only created the first
+    time someone asks for it; until then the person in an occupied cell is
+    susceptible, and is stored as nothing more than a flag for the cell.
     """
-    def __init__(self, num_rows: int, num_cols: int, num_people: int):
+    def __init__(self, num_rows: int, num_cols: int, num_people: int,
+                 rng: streams.RandomStream = None):
         """Initialize the population with a grid of nrows x ncols cells and
         randomly located npeople individuals, who are all intialized as vulnerable.
         
@@ -176,68 +243,112 @@ class Population(observer.Observable):
             nrows: The number of rows in the grid.
             ncols: The number of columns in the grid.
             npeople: The initial number of people in the population.
+            rng: The source of every random draw in the simulation (a freshly
+                seeded one by default).
         """
         super().__init__()
+        self.rng = rng if rng is not None else streams.RandomStream()
         
         self._step_num = 0
         self._nrows = num_rows
         self._ncols = num_cols
-        self._people = []
-        self._grid = [[None for i in range(num_rows)] for j in range(num_cols)]
-        self._num_people = num_people
+        # Individuals created so far, by cell (row * num_cols + col)
+        self._people: Dict[int, Individual] = {}
+        # Individuals that may change state this step (a dict as an ordered set)
+        self._active: Dict[Individual, None] = {}
+        self.social = config.SOCIAL
+        self._indexes: Dict[int, NeighborIndex] = {}   # by distance
         
-        cells = [] # list of cells represented by (row, col) index tuples
-        while len(cells) < min(num_people, num_rows * num_cols):
-            i = random.randint(0, num_rows - 1)
-            j = random.randint(0, num_cols - 1)
-            if not (i, j) in cells: 
-                cells.append((i,j))
-        
-        for row, col in cells:
-            person = Individual(location = (row, col))
-            self._people.append(person)
-            self._grid[row][col] = person
+        # Sample distinct flat cell indices rather than retrying random
+        # (row, col) pairs, which slows to a crawl as the grid fills up
+        num_cells = num_rows * num_cols
+        self._cells = self.rng.sample(range(num_cells), min(num_people, num_cells))
+        self._occupied = bytearray(num_cells)
+        for cell in self._cells:
+            self._occupied[cell] = 1
         
     def __str__(self) -> str:
         """Returns a string representation of the population"""
-        res =  ''
-        for i in range(self._nrows):
-            for j in range(self._ncols):
-                if self._grid[i][j] is None:
-                    res += '.'.center(3)
-                else:
-                    # self._grid[i][j] is an Individual
-                    res += self._grid[i][j].get_char().center(3)
-            res += '\n'
-        return res    
+        chars = {health: health.name[0].center(3) for health in Health}
+        empty, susceptible = '.'.center(3), chars[Health.SUSCEPTIBLE]
+        cells = [susceptible if occupied else empty for occupied in self._occupied]
+        for cell, person in self._people.items():
+            cells[cell] = chars[person.get_health()]
+        return ''.join(''.join(cells[start:start + self._ncols]) + '\n'
+                       for start in range(0, len(cells), self._ncols))
+    
+    def _person(self, cell: int) -> Optional[Individual]:
+        """The individual in a cell (creating it if need be), or None"""
+        person = self._people.get(cell)
+        if person is None and self._occupied[cell]:
+            person = Individual(location = divmod(cell, self._ncols))
+            self._people[cell] = person
+        return person
     
     def get_individual(self, row: int, col: int):
         """Return the individual at the specified row and column, or None"""
-        if row < 0 or row > self._nrows or col > self._ncols or col < 0:
+        if row < 0 or row >= self._nrows or col >= self._ncols or col < 0:
             raise ValueError("Invalid row or column")
-        return self._grid[row][col]
+        return self._person(row * self._ncols + col)
+        
+    def counts(self) -> Dict[Health, int]:
+        """Returns the number of individuals in each health state"""
+        totals = dict.fromkeys(Health, 0)
+        for person in self._people.values():
+            totals[person.get_health()] += 1
+        # Nobody has changed state without having been created
+        totals[Health.SUSCEPTIBLE] += len(self._cells) - len(self._people)
+        return totals
+    
+    def snapshot(self) -> List[int]:
+        """Returns the health of every cell, row by row, as Health values
+        (0 for an empty cell)"""
+        susceptible = Health.SUSCEPTIBLE.value
+        codes = [susceptible if occupied else 0 for occupied in self._occupied]
+        for cell, person in self._people.items():
+            codes[cell] = person.get_health().value
+        return codes
         
     def step(self): 
-        """Perform a single update the entire population grid.
-        This iterates over the grid elements and invokes their step() method.
+        """Perform a single update of the population.
+        This invokes the step() method of each individual in the active set.
+        Nothing has changed yet, so observers are not notified until tick().
         """
-        for row in range(self._nrows):
-            for col in range(self._ncols):
-                if self._grid[row][col] is not None:
-                    self._grid[row][col].step(region = self)   
-
-        self.notify_all("Grid updated")    
+        for person in list(self._active):
+            person.step(region = self)
     
     def tick(self):
-        """Advance the time step for the whole grid."""
+        """Advance the time step for the active individuals, then rebuild
+        the active set around those who are now infected. Observers get
+        the step's state changes as one observer.Transitions event, with
+        each individual identified by its cell (row * ncols + col)."""
         self._step_num += 1
     
-        for row in range(self._nrows):
-            for col in range(self._ncols):
-                if self._grid[row][col] is not None:
-                    self._grid[row][col].tick()
+        ids, old, new = [], [], []
+        for person in self._active:
+            before = person.get_health()
+            person.tick()
+            after = person.get_health()
+            if after != before:
+                row, col = person.get_location()
+                ids.append(row * self._ncols + col)
+                old.append(before)
+                new.append(after)
+        self._activate([person for person in self._active
+                        if person.get_health() == Health.INFECTED])
                     
-        self.notify_all("Grid updated")
+        if self.has_observers():
+            self.notify_all(observer.Transitions(self._step_num, ids, old, new))
+
+    def _activate(self, infected: List[Individual]):
+        """Make the active set the infected individuals and their susceptible
+        neighbors within Visit_Dist."""
+        active = dict.fromkeys(infected)
+        for person in infected:
+            for neighbor in self.neighbors_of(person):
+                if neighbor.get_health() == Health.SUSCEPTIBLE:
+                    active[neighbor] = None
+        self._active = active
 
 
             
@@ -248,10 +359,26 @@ class Population(observer.Observable):
         Args:
             num_sick: The number of sick individuals to select.
         """
-        infected_list = random.sample(self._people, num_sick)
+        infected_list = [self._person(cell) for cell in self.rng.sample(self._cells, num_sick)]
         for person in infected_list:
             person.set_health(Health.INFECTED)
             person.set_next_state(Health.INFECTED)  # stay infected in next step
+        self._activate(infected_list)
+                
+    def neighbor_index(self, max_dist: int) -> NeighborIndex:
+        """The (shared) index of neighbors within max_dist, wrapping around
+        the edges if config.GRID['Torus'] is set"""
+        index = self._indexes.get(max_dist)
+        if index is None:
+            index = NeighborIndex(self._occupied, self._ncols, max_dist, self._person,
+                                  torus=config.GRID.get('Torus', False))
+            self._indexes[max_dist] = index
+        return index
+    
+    def neighbors_of(self, person: Individual) -> tuple:
+        """The individuals within Visit_Dist of person"""
+        row, col = person.get_location()
+        return self.neighbor_index(self.social['Visit_Dist']).people(row, col)
                 
     def get_neighbors(self, coord: tuple, max_dist: int) -> List[tuple]:
         """Returns a list of neighboring individual closer than the max distance.
@@ -264,18 +391,4 @@ class Population(observer.Observable):
             A list of coordinate tuples (row, col) of neighbors within 
             within max_dist of the given coordinate.
         """
-        (i, j) = coord
-        if max_dist == 1:
-            neighbors = [(i - max_dist, j - max_dist), (i - max_dist, j), (i - max_dist, j + max_dist), (i, j - max_dist), (i + max_dist, j - max_dist), (i + max_dist, j), (i + max_dist, j + max_dist)]
-        elif max_dist == 2:
-            neighbors = [(i - (max_dist), j - max_dist), (i - max_dist, j - 1), (i - (max_dist), j), (i - max_dist, j + 1), (i - max_dist, j + max_dist), (i - 1, j - 1), (i - 1, j), (i - 1, j + 1), (i, j - 1), (i + 1, j - 1), (i + 1, j), (i + 1, j + 1)(i + 1, j), (i + 1, j + 1)]
-
-        # and so on ...
-
-        # I believe the implementation above would work, even if I kept going, but
-        # it's not the most effective/ simple
-
-        for i, j in list(neighbors):
-            if i < 0 or i not in self._grid or j < 0 or j not in self._grid:
-                neighbors.remove((i, j))
-        return neighbors
\ No newline at end of file
+        return self.neighbor_index(max_dist).coords(*coord)
@@ -8,9 +8,12 @@ Also included in this module are to example concrete implementations:
     - a concrete class, Watched, which extends Observable and shows how to
     attach an Observer to it, so it would be notified whenever the Watched 
     instances change.
+
+Events are usually short strings, but can also be typed Event objects, such
+as a Transitions batch that reports many state changes in one notification.
 """
 
-from typing import List
+from typing import Iterator, List, NamedTuple, Sequence, Union
 
 ###############################################################################
 # Interface definitions (abstract base classes) for the Observer and Observable
@@ -23,7 +26,7 @@ class Observer:
     For example, in MVC, a controller might be notified when the model changes, 
     and the controller might be notified when the view changes.
     """
-    def receive_notification(self, subject: "Observable", event: str):
+    def receive_notification(self, subject: "Observable", event: Union[str, "Event"]):
         """Notify the observer that the subject has changed.
         
         Args:
@@ -40,6 +43,9 @@ class Observable:
     For example, in MVC, a view can be monitored (observed) by a controller
     whenever the user provides input into the view.
     """
+    # Lets subclasses with many instances (e.g., model.Individual)
+    # declare __slots__ of their own
+    __slots__ = ('_observers',)
 
     def __init__(self):
         self._observers: List[Observer] = []
@@ -47,9 +53,59 @@ class Observable:
     def add_observer(self, observer: Observer):
         self._observers.append(observer)
 
-    def notify_all(self, event: str):
+    def has_observers(self) -> bool:
+        """True if anyone would hear a notification, so that callers can
+        skip building events nobody receives."""
+        return bool(self._observers)
+
+    def notify_all(self, event: Union[str, "Event"]):
         for observer in self._observers:
             observer.receive_notification(self, event)   # implemented by Observer subclasses
+
+
+###############################################################################
+# Typed events
+###############################################################################
+
+class Event:
+    """Base class for events that carry data. An event is only formatted
+    as text when an observer actually asks for str(event)."""
+    def __str__(self) -> str:
+        return type(self).__name__
+
+
+class Transition(NamedTuple):
+    """One object changing state"""
+    id: int
+    old: object
+    new: object
+
+
+class Transitions(Event):
+    """All the state changes of one update (e.g., one tick of a simulation),
+    delivered as a single notification instead of one per object.
+    """
+    def __init__(self, time: int, ids: Sequence[int], old: Sequence, new: Sequence):
+        """Args:
+            time: when the changes happened (e.g., the step number)
+            ids, old, new: parallel sequences of object ids and their
+                states before and after
+        """
+        self.time = time
+        self.ids = ids
+        self.old = old
+        self.new = new
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[Transition]:
+        return map(Transition, self.ids, self.old, self.new)
+
+    def __str__(self) -> str:
+        lines = [f"{len(self)} state changes at time {self.time}"]
+        lines.extend(f"  {change.id}: {change.old} -> {change.new}" for change in self)
+        return '\n'.join(lines)
             
             
 ###############################################################################
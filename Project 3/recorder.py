@@ -0,0 +1,181 @@
+"""Time-series recording of contagion runs.
+
+A Recorder observes a population (model.Population or
+vector_model.ArrayPopulation) and keeps, for every step, the number of
+individuals in each health state and the number of new infections,
+updated from the Transitions event of each tick rather than by scanning
+the grid. Optionally it also keeps the full state of the grid, as one
+initial snapshot plus the cells that changed at each step (delta
+encoding), which is enough to replay the run.
+
+Recordings are written to CSV, NPZ (needs NumPy) or Parquet (needs
+pyarrow), chosen by file extension, either all at once with save() or,
+for CSV, in chunks during the run.
+"""
+
+import observer
+from model import Health
+
+from array import array
+from typing import List, Optional
+import csv
+import os
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+import logging
+
+logging.basicConfig()
+log = logging.getLogger(__name__)
+log.setLevel(logging.INFO)
+
+COLUMNS = ['step'] + [health.name.lower() for health in Health] + ['new_infections']
+
+# Position of each health state in a row of counts
+_COLUMN = {health: i for i, health in enumerate(Health)}
+
+
+class Recorder(observer.Observer):
+    """Records a population's S/I/R/D counts (and optionally its states)
+    at every step. Attach it after seeding, so that it starts from the
+    seeded state.
+    """
+    def __init__(self, population: observer.Observable, snapshots: bool = False,
+                 stream_to: Optional[str] = None, chunk_steps: int = 1000):
+        """Args:
+            population: the population to record; the recorder adds itself
+                as an observer
+            snapshots: also record the state of every cell
+            stream_to: a CSV path to write the counts to every chunk_steps
+                steps (and on close()) instead of keeping them all in memory
+            chunk_steps: steps per chunk when streaming
+        """
+        self._current = list(population.counts().values())
+        self.steps = array('l', [0])
+        self.counts = [array('l', [count]) for count in self._current]
+        self.new_infections = array('l', [0])
+
+        self.snapshots = snapshots
+        if snapshots:
+            self.initial = array('b', population.snapshot())
+            # Cells changed at step delta_steps[k] are
+            # delta_cells[delta_ptr[k]:delta_ptr[k + 1]]
+            self.delta_steps = array('l')
+            self.delta_ptr = array('q', [0])
+            self.delta_cells = array('q')
+            self.delta_codes = array('b')
+
+        self._stream = None
+        self.chunk_steps = chunk_steps
+        if stream_to is not None:
+            self._stream = open(stream_to, 'w', newline='')
+            csv.writer(self._stream).writerow(COLUMNS)
+        population.add_observer(self)
+
+    def receive_notification(self, subject: observer.Observable, event):
+        """Record the changes of one tick"""
+        if not isinstance(event, observer.Transitions):
+            return
+        new_infections = 0
+        for old, new in zip(event.old, event.new):
+            self._current[_COLUMN[old]] -= 1
+            self._current[_COLUMN[new]] += 1
+            new_infections += new == Health.INFECTED
+        self.steps.append(event.time)
+        for column, count in zip(self.counts, self._current):
+            column.append(count)
+        self.new_infections.append(new_infections)
+
+        if self.snapshots:
+            self.delta_steps.append(event.time)
+            self.delta_cells.extend(event.ids)
+            self.delta_codes.extend(health.value for health in event.new)
+            self.delta_ptr.append(len(self.delta_cells))
+
+        if self._stream is not None and len(self.steps) >= self.chunk_steps:
+            self.flush()
+
+    def rows(self) -> List[tuple]:
+        """The recorded counts not yet streamed, one row per step in
+        COLUMNS order"""
+        return list(zip(self.steps, *self.counts, self.new_infections))
+
+    def flush(self):
+        """Write the rows recorded so far to the stream and forget them"""
+        csv.writer(self._stream).writerows(self.rows())
+        self._stream.flush()
+        for column in [self.steps, self.new_infections] + self.counts:
+            del column[:]
+
+    def close(self):
+        """Finish streaming, if streaming"""
+        if self._stream is not None:
+            self.flush()
+            self._stream.close()
+            self._stream = None
+
+    def save(self, path: str):
+        """Write the recording (the counts not already streamed) to path:
+        .csv, .npz or .parquet. For CSV and Parquet, snapshots go to a
+        second file next to it (e.g., run.csv and run.deltas.csv) with a
+        row per (step, cell, health), where step 0 lists every occupied
+        cell."""
+        stem, ext = os.path.splitext(path)
+        columns = dict(zip(COLUMNS, [self.steps] + self.counts + [self.new_infections]))
+        if ext == '.npz':
+            if np is None:
+                raise RuntimeError("Saving .npz recordings needs NumPy")
+            arrays = {name: np.asarray(column) for name, column in columns.items()}
+            if self.snapshots:
+                arrays.update(initial=np.asarray(self.initial, dtype=np.int8),
+                              delta_steps=np.asarray(self.delta_steps),
+                              delta_ptr=np.asarray(self.delta_ptr),
+                              delta_cells=np.asarray(self.delta_cells),
+                              delta_codes=np.asarray(self.delta_codes, dtype=np.int8))
+            np.savez_compressed(path, **arrays)
+        elif ext == '.csv':
+            with open(path, 'w', newline='') as out:
+                writer = csv.writer(out)
+                writer.writerow(COLUMNS)
+                writer.writerows(self.rows())
+            if self.snapshots:
+                with open(f"{stem}.deltas{ext}", 'w', newline='') as out:
+                    writer = csv.writer(out)
+                    writer.writerow(['step', 'cell', 'health'])
+                    writer.writerows(zip(*self._deltas()))
+        elif ext == '.parquet':
+            if pyarrow is None:
+                raise RuntimeError("Saving .parquet recordings needs pyarrow")
+            pyarrow.parquet.write_table(pyarrow.table({name: list(column)
+                                                       for name, column in columns.items()}), path)
+            if self.snapshots:
+                steps, cells, codes = self._deltas()
+                table = pyarrow.table({'step': steps, 'cell': cells, 'health': codes})
+                pyarrow.parquet.write_table(table, f"{stem}.deltas{ext}")
+        else:
+            raise ValueError(f"Unknown recording format {ext}")
+        log.info(f"Recorded {len(self.steps)} steps to {path}")
+
+    def _deltas(self) -> tuple:
+        """The initial snapshot and the changes as (steps, cells, codes)
+        columns"""
+        steps, cells, codes = array('l'), array('q'), array('b')
+        for cell, code in enumerate(self.initial):
+            if code:
+                steps.append(0)
+                cells.append(cell)
+                codes.append(code)
+        for step, start, end in zip(self.delta_steps, self.delta_ptr, self.delta_ptr[1:]):
+            steps.extend([step] * (end - start))
+        cells.extend(self.delta_cells)
+        codes.extend(self.delta_codes)
+        return list(steps), list(cells), list(codes)
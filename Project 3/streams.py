@@ -0,0 +1,78 @@
+"""Seedable random number streams for the contagion model.
+
+A RandomStream is the source of every random draw a population makes, so
+that a run can be repeated exactly from its seed. Streams can spawn any
+number of independent child streams, one per replicate or worker, so
+parallel runs neither share state nor overlap.
+
+With NumPy installed, a stream wraps a numpy.random.Generator seeded
+through a SeedSequence (whose spawn() gives statistically independent
+children), and single uniform draws are served from blocks generated in
+one call. Without NumPy it falls back on random.Random, with children
+seeded from the parent's seed and their index.
+"""
+
+import random
+
+from typing import List, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class RandomStream:
+    """A seedable source of random numbers"""
+
+    # Uniform numbers drawn from the generator at a time
+    BLOCK = 4096
+
+    def __init__(self, seed=None):
+        """Args:
+            seed: an int, or the seed attribute of another stream to
+                recreate it from the start; None for a fresh random seed
+        """
+        if np is not None:
+            if not isinstance(seed, np.random.SeedSequence):
+                seed = np.random.SeedSequence(seed)
+            self.generator = np.random.default_rng(seed)
+            self._block = iter(())
+        else:
+            if seed is None:
+                seed = random.randrange(2 ** 63)
+            self.generator = None
+            self._random = random.Random(seed)
+            # random.Random is fast enough per draw; no blocks needed
+            self.random = self._random.random
+        self.seed = seed
+        self._spawned = 0
+
+    @property
+    def entropy(self):
+        """What to pass to RandomStream to replay a stream that was not spawned"""
+        return self.seed.entropy if np is not None else self.seed
+
+    def random(self) -> float:
+        """A uniform random number in [0, 1)"""
+        try:
+            return next(self._block)
+        except StopIteration:
+            self._block = iter(self.generator.random(self.BLOCK).tolist())
+            return next(self._block)
+
+    def sample(self, population: Sequence, k: int) -> list:
+        """k distinct elements of population, in random order"""
+        if self.generator is not None:
+            return [population[i] for i in
+                    self.generator.choice(len(population), size=k, replace=False).tolist()]
+        return self._random.sample(population, k)
+
+    def spawn(self, n: int) -> List["RandomStream"]:
+        """n new streams, independent of this one and of each other"""
+        if np is not None:
+            children = self.seed.spawn(n)
+        else:
+            children = [f"{self.seed}/{self._spawned + i}" for i in range(n)]
+        self._spawned += n
+        return [RandomStream(child) for child in children]
@@ -0,0 +1,205 @@
+"""Parameter sweeps for the contagion model.
+
+Runs the simulation for every combination of the given parameter values,
+several seeded replicates each, across a pool of worker processes, and
+summarizes the per-step S/I/R/D counts of each combination as a CSV
+table of means and quantiles over its replicates. Parameters are named
+by their key in any of the config.py dictionaries, with values given as
+a comma-separated list or as start:stop:step:
+
+    python3 sweep.py P_Transmit=0.1,0.25,0.5 T_Recover=3:9:2 \\
+        --replicates 100 --out summary.csv
+"""
+
+import config
+import contagion
+import model
+import streams
+from model import Health
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Sequence, Tuple
+import argparse
+import contextlib
+import csv
+import itertools
+import sys
+
+import logging
+
+logging.basicConfig()
+log = logging.getLogger(__name__)
+log.setLevel(logging.INFO)
+
+# The config.py dictionaries a swept parameter can come from
+SECTIONS = (config.GRID, config.POPULATION, config.DISEASE, config.SOCIAL)
+
+QUANTILES = (0.05, 0.5, 0.95)
+
+
+def parse_values(text: str) -> List[float]:
+    """Values of a parameter: 'a,b,c' or 'start:stop:step' (stop inclusive)"""
+    if ':' in text:
+        start, stop, step = (float(part) for part in text.split(':'))
+        count = int(round((stop - start) / step)) + 1
+        values = [start + i * step for i in range(count)]
+    else:
+        values = [float(part) for part in text.split(',')]
+    # Keep whole numbers integral, so e.g. T_Recover stays an int
+    return [int(value) if value.is_integer() else value for value in values]
+
+
+def section(name: str) -> dict:
+    """The config.py dictionary holding the named parameter"""
+    for params in SECTIONS:
+        if name in params:
+            return params
+    raise ValueError(f"Unknown parameter {name}")
+
+
+@contextlib.contextmanager
+def patched(params: Dict[str, float]):
+    """Temporarily set parameters in the config.py dictionaries, which
+    the model reads while it runs.
+    """
+    saved = {}
+    for name, value in params.items():
+        saved[name] = section(name)[name]
+        section(name)[name] = value
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            section(name)[name] = value
+
+
+def simulate(params: Dict[str, float], seed, engine: str = 'objects',
+             steps: int = config.TIMESTEPS) -> List[Tuple[int, int, int, int]]:
+    """Run one simulation and return its S/I/R/D counts before the
+    first step and after each step.
+
+    Args:
+        seed: the seed of the run's streams.RandomStream
+    """
+    with patched(params):
+        population = contagion.ENGINES[engine](config.GRID['Rows'], config.GRID['Cols'],
+                                               config.POPULATION['N_People'],
+                                               rng=streams.RandomStream(seed))
+        population.seed(num_sick=config.POPULATION['N_Infected'])
+        history = [tuple(population.counts().values())]
+        for _ in range(steps):
+            population.step()
+            population.tick()
+            history.append(tuple(population.counts().values()))
+    return history
+
+
+def _simulate(task: tuple) -> List[Tuple[int, int, int, int]]:
+    return simulate(*task)
+
+
+def _init_worker():
+    # Per-person debug logging would swamp the run
+    logging.getLogger(model.__name__).setLevel(logging.INFO)
+
+
+def quantile(ordered: Sequence[float], fraction: float) -> float:
+    """Quantile of sorted values, interpolating between neighbors"""
+    position = fraction * (len(ordered) - 1)
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def summarize(histories: List[List[Tuple[int, ...]]],
+              quantiles: Sequence[float] = QUANTILES) -> Iterator[List[float]]:
+    """Per step: the mean and quantiles of each state's count across
+    replicates, in the column order of header().
+    """
+    for counts in zip(*histories):
+        row = []
+        for state in zip(*counts):
+            ordered = sorted(state)
+            row.append(sum(ordered) / len(ordered))
+            row.extend(quantile(ordered, q) for q in quantiles)
+        yield row
+
+
+def header(names: Sequence[str], quantiles: Sequence[float] = QUANTILES) -> List[str]:
+    columns = list(names) + ['step']
+    for health in Health:
+        letter = health.name[0]
+        columns.append(f"{letter}_mean")
+        columns.extend(f"{letter}_q{q:g}" for q in quantiles)
+    return columns
+
+
+def sweep(ranges: Dict[str, List[float]], replicates: int, seed: int = 0,
+          engine: str = 'objects', steps: int = config.TIMESTEPS,
+          jobs: int = None) -> Iterator[Tuple[Dict[str, float], List[List[Tuple[int, ...]]]]]:
+    """Simulate every combination of parameter values.
+
+    Args:
+        ranges: values to try for each parameter
+        replicates: runs per combination; replicate r of every combination
+            uses the same random stream, the r-th spawned from seed
+        seed: base random seed
+        engine: population class, a key of contagion.ENGINES
+        steps: timesteps per run
+        jobs: worker processes (default: one per CPU; 1 runs in this process)
+
+    Yields:
+        (parameters, histories) per combination, one history per replicate
+    """
+    names = list(ranges)
+    combos = [dict(zip(names, values)) for values in itertools.product(*ranges.values())]
+    seeds = [stream.seed for stream in streams.RandomStream(seed).spawn(replicates)]
+    tasks = [(params, seeds[r], engine, steps) for params in combos for r in range(replicates)]
+    if jobs == 1:
+        _init_worker()
+        results = map(_simulate, tasks)
+        for params in combos:
+            yield params, list(itertools.islice(results, replicates))
+        return
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as pool:
+        results = pool.map(_simulate, tasks, chunksize=max(1, replicates // 4))
+        for params in combos:
+            yield params, list(itertools.islice(results, replicates))
+
+
+def cli() -> argparse.Namespace:
+    """Get arguments from the command line"""
+    parser = argparse.ArgumentParser(description="Contagion model parameter sweep")
+    parser.add_argument("ranges", nargs="+", metavar="NAME=VALUES",
+                        help="config.py parameter and its values, as a,b,c or start:stop:step")
+    parser.add_argument("-r", "--replicates", type=int, default=10,
+                        help="Seeded runs per combination of values")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="Base random seed")
+    parser.add_argument("-e", "--engine", choices=sorted(contagion.ENGINES), default="objects")
+    parser.add_argument("-t", "--steps", type=int, default=config.TIMESTEPS,
+                        help="Timesteps per run")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Worker processes (default: one per CPU)")
+    parser.add_argument("-o", "--out", type=argparse.FileType("w"), default=sys.stdout,
+                        help="Summary CSV file (default: stdout)")
+    return parser.parse_args()
+
+
+def main():
+    args = cli()
+    ranges = {}
+    for spec in args.ranges:
+        name, _, values = spec.partition("=")
+        section(name)     # reject unknown names before starting any runs
+        ranges[name] = parse_values(values)
+    writer = csv.writer(args.out)
+    writer.writerow(header(ranges))
+    for params, histories in sweep(ranges, args.replicates, args.seed,
+                                   args.engine, args.steps, args.jobs):
+        log.info(f"Finished {params}")
+        for step, row in enumerate(summarize(histories)):
+            writer.writerow(list(params.values()) + [step] + row)
+
+
+if __name__ == "__main__":
+    main()
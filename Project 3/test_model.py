@@ -0,0 +1,501 @@
+"""Test cases for the contagion model"""
+
+import unittest
+import config
+import model
+import observer
+import recorder
+import streams
+import sweep
+import views
+from model import Health
+try:
+    import numpy as np
+    import vector_model
+except ImportError:     # NumPy is optional
+    np = vector_model = None
+import csv
+import logging
+import os
+import statistics
+import tempfile
+from unittest import mock
+
+# Per-person debug logging would swamp the test output
+logging.getLogger(model.__name__).setLevel(logging.INFO)
+
+ENGINES = [model.Population] + ([vector_model.ArrayPopulation] if vector_model else [])
+
+# Slow enough that outbreaks neither die out at once nor take everyone
+SLOW = {'P_Transmit': 0.1, 'Visit_Dist': 1}
+
+
+def make(population_class, seed, rows: int = 20, cols: int = 20, people: int = 300):
+    """A population placed at random from seed"""
+    return population_class(rows, cols, people, rng=streams.RandomStream(seed))
+
+
+def run(population_class, seed, steps: int = 10, sick: int = 3):
+    """A seeded, stepped population and its counts after each step"""
+    population = make(population_class, seed)
+    population.seed(num_sick=sick)
+    history = []
+    for _ in range(steps):
+        population.step()
+        population.tick()
+        history.append(tuple(population.counts().values()))
+    return population, history
+
+
+def occupied(population: model.Population) -> list:
+    """(row, col) of every cell with someone in it, row by row"""
+    return [(row, col) for row in range(population._nrows) for col in range(population._ncols)
+            if population.get_individual(row, col) is not None]
+
+
+class Events(observer.Observer):
+    """Keeps every event it hears"""
+    def __init__(self):
+        self.events = []
+
+    def receive_notification(self, subject, event):
+        self.events.append(event)
+
+
+class TestHealth(unittest.TestCase):
+
+    def test_get_random(self):
+        rng = streams.RandomStream(1)
+        drawn = {Health.get_random(rng) for _ in range(200)}
+        self.assertEqual(drawn, set(Health))
+
+
+class TestStreams(unittest.TestCase):
+
+    def test_seeded_repeats(self):
+        first, second = streams.RandomStream(42), streams.RandomStream(42)
+        self.assertEqual([first.random() for _ in range(5000)],
+                         [second.random() for _ in range(5000)])
+        self.assertEqual(first.sample(range(100), 10), second.sample(range(100), 10))
+
+    def test_replay_from_entropy(self):
+        rng = streams.RandomStream()
+        replay = streams.RandomStream(rng.entropy)
+        self.assertEqual([rng.random() for _ in range(10)], [replay.random() for _ in range(10)])
+
+    def test_spawned_streams_differ(self):
+        children = streams.RandomStream(7).spawn(3)
+        draws = [tuple(child.random() for _ in range(4)) for child in children]
+        self.assertEqual(len(set(draws)), 3)
+        again = streams.RandomStream(7).spawn(3)
+        self.assertEqual(draws[1], tuple(again[1].random() for _ in range(4)))
+
+
+class TestPopulation(unittest.TestCase):
+
+    def test_placement(self):
+        """People land in distinct cells of a non-square grid"""
+        population = model.Population(30, 20, 500)
+        cells = occupied(population)
+        self.assertEqual(len(cells), 500)
+        for row, col in cells:
+            self.assertEqual(population.get_individual(row, col).get_health(), Health.SUSCEPTIBLE)
+        lines = str(population).splitlines()
+        self.assertEqual(len(lines), 30)
+        self.assertEqual(len(lines[0]), 20 * 3)
+        self.assertEqual(str(population).count('S'), 500)
+
+    def test_full_grid(self):
+        """More people than cells fill the grid"""
+        population = model.Population(4, 5, 25)
+        self.assertEqual(len(occupied(population)), 20)
+
+    def test_seeded_placement_repeats(self):
+        first = occupied(make(model.Population, 9, 30, 20, 100))
+        self.assertEqual(occupied(make(model.Population, 9, 30, 20, 100)), first)
+
+    def test_seeded_runs_repeat(self):
+        with sweep.patched(SLOW):
+            first, first_history = run(model.Population, 11)
+            second, second_history = run(model.Population, 11)
+        self.assertEqual(first_history, second_history)
+        self.assertEqual(str(first), str(second))
+
+    def test_replay_from_entropy(self):
+        """A run from a fresh random seed can be repeated from its entropy"""
+        rng = streams.RandomStream()
+        with sweep.patched(SLOW):
+            population = model.Population(20, 20, 300, rng=rng)
+            population.seed(num_sick=3)
+            for _ in range(10):
+                population.step()
+                population.tick()
+            replay, _ = run(model.Population, rng.entropy)
+        self.assertEqual(population.snapshot(), replay.snapshot())
+
+    def test_transmission(self):
+        with sweep.patched(SLOW):
+            _, history = run(model.Population, 5)
+        self.assertLess(history[-1][0], 300 - 3)
+        self.assertEqual(sum(history[-1]), 300)
+
+    def test_active_set(self):
+        """Only the infected and their susceptible neighbors are active"""
+        with sweep.patched(SLOW):
+            population, _ = run(model.Population, 8, steps=3)
+            infected = {person for person in population._people.values()
+                        if person.get_health() == Health.INFECTED}
+            expected = set(infected)
+            for person in infected:
+                expected.update(neighbor for neighbor in population.neighbors_of(person)
+                                if neighbor.get_health() == Health.SUSCEPTIBLE)
+        self.assertTrue(infected)
+        self.assertEqual(set(population._active), expected)
+
+    def test_inactive_keep_their_clock(self):
+        """Nobody outside the active set steps or ticks"""
+        with sweep.patched(SLOW):
+            population, _ = run(model.Population, 8, steps=3)
+            outside = [person for person in population._people.values()
+                       if person not in population._active]
+            before = [(person.get_health(), person._time_in_state) for person in outside]
+            population.step()
+            population.tick()
+        self.assertTrue(outside)
+        self.assertEqual([(person.get_health(), person._time_in_state) for person in outside],
+                         before)
+
+
+class TestNeighbors(unittest.TestCase):
+
+    def test_edges(self):
+        population = model.Population(5, 5, 25)
+        self.assertEqual(population.get_neighbors((0, 0), 1), [(0, 1), (1, 0), (1, 1)])
+        self.assertEqual(len(population.get_neighbors((4, 4), 2)), 8)
+        self.assertEqual(len(population.get_neighbors((2, 2), 1)), 8)
+        self.assertEqual(len(population.get_neighbors((2, 2), 5)), 24)
+
+    def test_empty_cells_skipped(self):
+        population = model.Population(6, 6, 10)
+        cells = occupied(population)
+        for row in range(6):
+            for col in range(6):
+                neighbors = population.get_neighbors((row, col), 2)
+                expected = [(i, j) for i, j in cells if (i, j) != (row, col)
+                            and abs(i - row) <= 2 and abs(j - col) <= 2]
+                self.assertEqual(neighbors, expected)
+
+    def test_torus(self):
+        with sweep.patched({'Torus': True}):
+            population = model.Population(5, 5, 25)
+            neighbors = population.get_neighbors((0, 0), 1)
+        self.assertEqual(set(neighbors), {(4, 4), (4, 0), (4, 1), (0, 4), (0, 1),
+                                          (1, 4), (1, 0), (1, 1)})
+
+    def test_torus_smaller_than_reach(self):
+        """Wrapping a grid narrower than the neighborhood counts each cell once"""
+        with sweep.patched({'Torus': True}):
+            population = model.Population(3, 3, 9)
+            neighbors = population.get_neighbors((1, 1), 2)
+        self.assertEqual(len(neighbors), 8)
+        self.assertNotIn((1, 1), neighbors)
+
+    def test_people_match_coords(self):
+        population = model.Population(8, 8, 40)
+        index = population.neighbor_index(2)
+        people = index.people(3, 3)
+        self.assertIs(people, index.people(3, 3))
+        self.assertEqual([person.get_location() for person in people], index.coords(3, 3))
+        self.assertEqual(len(index.offsets), 24)
+
+
+class TestTransitions(unittest.TestCase):
+
+    def test_event(self):
+        event = observer.Transitions(3, [7, 9], [Health.SUSCEPTIBLE, Health.INFECTED],
+                                     [Health.INFECTED, Health.RECOVERED])
+        self.assertEqual(len(event), 2)
+        self.assertEqual(list(event)[1], observer.Transition(9, Health.INFECTED, Health.RECOVERED))
+        self.assertEqual(str(event).splitlines(),
+                         ["2 state changes at time 3", "  7: susceptible -> infected",
+                          "  9: infected -> recovered"])
+
+    def test_ticks_report_changes(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine.__name__), sweep.patched(SLOW):
+                population = make(engine, 2)
+                population.seed(num_sick=3)
+                events = Events()
+                population.add_observer(events)
+                for step in range(1, 8):
+                    before = list(population.snapshot())
+                    population.step()
+                    population.tick()
+                    after = list(population.snapshot())
+                    event = events.events[-1]
+                    self.assertIsInstance(event, observer.Transitions)
+                    self.assertEqual(event.time, step)
+                    changed = {cell for cell, (old, new) in enumerate(zip(before, after))
+                               if old != new}
+                    self.assertEqual(set(event.ids), changed)
+                    for change in event:
+                        self.assertEqual(change.old.value, before[change.id])
+                        self.assertEqual(change.new.value, after[change.id])
+
+    def test_view_does_not_format_population(self):
+        """Notifications from step() and tick() never stringify the grid"""
+        for engine in ENGINES:
+            with self.subTest(engine=engine.__name__), sweep.patched(SLOW), \
+                    mock.patch.object(engine, '__str__', autospec=True,
+                                      return_value="grid") as to_str:
+                population = make(engine, 2)
+                population.seed(num_sick=3)
+                view = views.TextView(delay=0)
+                population.add_observer(view)
+                for _ in range(5):
+                    population.step()
+                    population.tick()
+                self.assertEqual(len(view.contents), 5)
+                to_str.assert_not_called()
+
+    def test_text_view_shows_notified_state(self):
+        with sweep.patched(SLOW):
+            population = make(model.Population, 2)
+            population.seed(num_sick=3)
+            view = views.TextView(delay=0)
+            population.add_observer(view)
+            population.step()
+            population.tick()
+            first = [view._format(item) for item in view.contents]
+            for _ in range(5):
+                population.step()
+                population.tick()
+        self.assertEqual([view._format(item) for item in view.contents[:len(first)]], first)
+
+
+class TestRecorder(unittest.TestCase):
+
+    def record(self, engine, steps: int = 8) -> recorder.Recorder:
+        with sweep.patched(SLOW):
+            population = make(engine, 6)
+            population.seed(num_sick=3)
+            history = recorder.Recorder(population, snapshots=True)
+            for _ in range(steps):
+                population.step()
+                population.tick()
+        self.final = list(population.snapshot())
+        self.final_counts = tuple(population.counts().values())
+        return history
+
+    def test_counts(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine.__name__):
+                history = self.record(engine)
+                rows = history.rows()
+                self.assertEqual(len(rows), 9)
+                self.assertEqual([row[0] for row in rows], list(range(9)))
+                self.assertEqual(rows[-1][1:5], self.final_counts)
+                for before, after in zip(rows, rows[1:]):
+                    # Only new infections leave the susceptible column
+                    self.assertEqual(before[1] - after[1], after[5])
+                    self.assertEqual(sum(after[1:5]), 300)
+                self.assertEqual(sum(row[5] for row in rows) + 3,
+                                 300 - rows[-1][1])
+
+    def test_deltas_replay(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine.__name__):
+                history = self.record(engine)
+                replay = list(history.initial)
+                for start, end in zip(history.delta_ptr, history.delta_ptr[1:]):
+                    for cell, code in zip(history.delta_cells[start:end],
+                                          history.delta_codes[start:end]):
+                        replay[cell] = code
+                self.assertEqual(replay, self.final)
+
+    def test_csv_round_trip(self):
+        history = self.record(model.Population)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "run.csv")
+            history.save(path)
+            with open(path, newline='') as saved:
+                rows = list(csv.reader(saved))
+            self.assertEqual(rows[0], recorder.COLUMNS)
+            self.assertEqual([tuple(map(int, row)) for row in rows[1:]], history.rows())
+            with open(os.path.join(tmp, "run.deltas.csv"), newline='') as saved:
+                deltas = list(csv.reader(saved))
+        self.assertEqual(deltas[0], ['step', 'cell', 'health'])
+        replay = [0] * len(self.final)
+        for step, cell, code in deltas[1:]:
+            replay[int(cell)] = int(code)
+        self.assertEqual(replay, self.final)
+
+    def test_streamed_csv(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "stream.csv")
+            with sweep.patched(SLOW):
+                population = make(model.Population, 6)
+                population.seed(num_sick=3)
+                history = recorder.Recorder(population, stream_to=path, chunk_steps=3)
+                for _ in range(8):
+                    population.step()
+                    population.tick()
+                history.close()
+            with open(path, newline='') as saved:
+                rows = list(csv.reader(saved))
+        self.assertEqual([int(row[0]) for row in rows[1:]], list(range(9)))
+        self.assertEqual(tuple(map(int, rows[-1][1:5])), tuple(population.counts().values()))
+
+    @unittest.skipIf(np is None, "needs NumPy")
+    def test_npz_round_trip(self):
+        history = self.record(model.Population)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "run.npz")
+            history.save(path)
+            with np.load(path) as saved:
+                arrays = dict(saved)
+        self.assertEqual(list(zip(*(arrays[name].tolist() for name in recorder.COLUMNS))),
+                         history.rows())
+        replay = arrays['initial'].copy()
+        ptr = arrays['delta_ptr']
+        for start, end in zip(ptr, ptr[1:]):
+            replay[arrays['delta_cells'][start:end]] = arrays['delta_codes'][start:end]
+        self.assertEqual(replay.tolist(), self.final)
+        self.assertEqual(arrays['delta_steps'].tolist(), list(range(1, 9)))
+
+    def test_unknown_format(self):
+        history = self.record(model.Population, steps=1)
+        with self.assertRaises(ValueError):
+            history.save("run.txt")
+
+
+@unittest.skipIf(vector_model is None, "needs NumPy")
+class TestArrayPopulation(unittest.TestCase):
+
+    def test_box_sum(self):
+        counts = np.random.default_rng(0).integers(0, 3, size=(7, 9))
+        for wrap in (False, True):
+            for radius in (0, 1, 2):
+                expected = np.zeros_like(counts)
+                for row in range(7):
+                    for col in range(9):
+                        for i in range(row - radius, row + radius + 1):
+                            for j in range(col - radius, col + radius + 1):
+                                if wrap:
+                                    expected[row, col] += counts[i % 7, j % 9]
+                                elif 0 <= i < 7 and 0 <= j < 9:
+                                    expected[row, col] += counts[i, j]
+                with self.subTest(wrap=wrap, radius=radius):
+                    np.testing.assert_array_equal(vector_model.box_sum(counts, radius, wrap),
+                                                  expected)
+
+    def test_box_sum_wider_than_torus(self):
+        """A wrapped square wider than the grid counts each cell once"""
+        rng = np.random.default_rng(1)
+        for rows, cols, radius in ((10, 10, 5), (7, 9, 4), (6, 11, 3), (4, 5, 8)):
+            counts = rng.integers(0, 3, size=(rows, cols))
+            expected = np.zeros_like(counts)
+            for row in range(rows):
+                for col in range(cols):
+                    near_rows = {i % rows for i in range(row - radius, row + radius + 1)}
+                    near_cols = {j % cols for j in range(col - radius, col + radius + 1)}
+                    expected[row, col] = sum(counts[i, j] for i in near_rows for j in near_cols)
+            with self.subTest(shape=(rows, cols), radius=radius):
+                np.testing.assert_array_equal(vector_model.box_sum(counts, radius, True),
+                                              expected)
+        single = np.zeros((10, 10), dtype=bool)
+        single[3, 4] = True
+        self.assertEqual(vector_model.box_sum(single, 5, wrap=True).max(), 1)
+
+    def test_placement(self):
+        population = make(vector_model.ArrayPopulation, 3, 30, 20, 500)
+        self.assertEqual(population.counts()[Health.SUSCEPTIBLE], 500)
+        self.assertEqual(int(population.occupied.sum()), 500)
+        cell = int(np.flatnonzero(population.occupied)[0])
+        self.assertEqual(population.get_health(*divmod(cell, 20)), Health.SUSCEPTIBLE)
+
+    def test_seeded_runs_repeat(self):
+        with sweep.patched(SLOW):
+            first, first_history = run(vector_model.ArrayPopulation, 11)
+            second, second_history = run(vector_model.ArrayPopulation, 11)
+        self.assertEqual(first_history, second_history)
+        np.testing.assert_array_equal(first.health, second.health)
+
+    def test_transmission(self):
+        with sweep.patched(SLOW):
+            _, history = run(vector_model.ArrayPopulation, 5)
+        self.assertLess(history[-1][0], 300 - 3)
+        self.assertEqual(sum(history[-1]), 300)
+
+    def test_infection_probability(self):
+        population = make(vector_model.ArrayPopulation, 0, 5, 5, 10)
+        p = population.infection_probability(np.array([0, 1, 4]))
+        p_contact = (config.SOCIAL['P_Visit'] * config.SOCIAL['P_Greet']
+                     * config.DISEASE['P_Transmit'])
+        self.assertEqual(p[0], 0)
+        self.assertAlmostEqual(p[1], 1 - (1 - p_contact) ** (2 * config.SOCIAL['N_Visits']))
+        self.assertLess(p[1], p[2])
+
+    def test_engines_agree(self):
+        """Mean outbreak sizes agree to within sampling error"""
+        sizes = {}
+        with sweep.patched(SLOW):
+            for engine in ENGINES:
+                sizes[engine] = [300 - run(engine, stream.seed, steps=15)[1][-1][0]
+                                 for stream in streams.RandomStream(0).spawn(40)]
+        objects, arrays = sizes.values()
+        error = (statistics.variance(objects) / len(objects)
+                 + statistics.variance(arrays) / len(arrays)) ** 0.5
+        self.assertGreater(statistics.mean(objects), 3)
+        self.assertLess(abs(statistics.mean(objects) - statistics.mean(arrays)), 4 * error)
+
+
+class TestSweep(unittest.TestCase):
+
+    def test_parse_values(self):
+        self.assertEqual(sweep.parse_values("0.1,0.25"), [0.1, 0.25])
+        self.assertEqual(sweep.parse_values("3:9:2"), [3, 5, 7, 9])
+        self.assertIsInstance(sweep.parse_values("3:9:2")[0], int)
+
+    def test_patched(self):
+        saved = config.DISEASE['P_Transmit']
+        with sweep.patched({'P_Transmit': 0.9}):
+            self.assertEqual(config.DISEASE['P_Transmit'], 0.9)
+        self.assertEqual(config.DISEASE['P_Transmit'], saved)
+        with self.assertRaises(ValueError):
+            sweep.section('No_Such_Parameter')
+
+    def test_sweep_transmits(self):
+        """Disease spreads in swept runs, and more so the more transmissible it is"""
+        ranges = {'P_Transmit': [0.0, 0.25]}
+        results = list(sweep.sweep(ranges, replicates=3, seed=1, steps=8, jobs=1))
+        self.assertEqual([params for params, _ in results],
+                         [{'P_Transmit': 0.0}, {'P_Transmit': 0.25}])
+        susceptible = {}
+        for params, histories in results:
+            self.assertEqual(len(histories), 3)
+            for history in histories:
+                self.assertEqual(len(history), 9)
+                self.assertEqual(history[0][1], config.POPULATION['N_Infected'])
+            susceptible[params['P_Transmit']] = [history[-1][0] for history in histories]
+        start = config.POPULATION['N_People'] - config.POPULATION['N_Infected']
+        self.assertEqual(susceptible[0.0], [start] * 3)
+        self.assertTrue(all(count < start for count in susceptible[0.25]))
+
+    def test_sweep_in_workers(self):
+        """Worker processes give the same runs as this process"""
+        ranges = {'T_Recover': [2, 4]}
+        here = list(sweep.sweep(ranges, replicates=2, seed=3, steps=5, jobs=1))
+        pooled = list(sweep.sweep(ranges, replicates=2, seed=3, steps=5, jobs=2))
+        self.assertEqual(pooled, here)
+
+    def test_summarize(self):
+        histories = [[(10, 0, 0, 0), (8, 2, 0, 0)], [(10, 0, 0, 0), (6, 4, 0, 0)]]
+        rows = list(sweep.summarize(histories, quantiles=(0, 0.5, 1)))
+        self.assertEqual(rows[1][:4], [7, 6, 7, 8])
+        self.assertEqual(len(sweep.header(['P_Transmit'], (0, 0.5, 1))),
+                         2 + len(rows[1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
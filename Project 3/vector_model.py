@@ -0,0 +1,193 @@
+"""Array-backed engine for the contagion model.
+
+ArrayPopulation is a drop-in alternative to model.Population for large
+grids. Instead of one Individual object per person, the whole grid is
+held in NumPy arrays (health state, time in state, occupancy), and each
+step computes every recovery, death and transmission at once: infected
+neighbors are counted for all cells from running totals, and the
+random numbers for a step are drawn in a few batches.
+
+The parameters are the same config.DISEASE and config.SOCIAL entries
+used by model.Individual. A susceptible person meets each neighbor
+within Visit_Dist about N_Visits times per step in each direction, and
+each visit is made with probability P_Visit, welcomed with probability
+P_Greet and transmits with probability P_Transmit, so with k infected
+neighbors the chance of becoming infected in a step is
+1 - (1 - P_Visit * P_Greet * P_Transmit) ** (2 * N_Visits * k).
+"""
+
+import numpy as np
+
+import config
+import observer
+import streams
+from model import Health
+
+from typing import Dict
+
+import logging
+
+logging.basicConfig()
+log = logging.getLogger(__name__)
+log.setLevel(logging.DEBUG)
+
+# Code in the health array for a cell with nobody in it
+EMPTY = 0
+
+# Characters for __str__, indexed by health code
+_CHARS = np.array(['.'.center(3)] + [health.name[0].center(3) for health in Health])
+
+
+def _window_sum(counts: np.ndarray, radius: int, wrap: bool, axis: int) -> np.ndarray:
+    """Sum of counts over the cells within radius of each cell along one
+    axis, from a running total. When wrapping, a window at least as long
+    as the axis covers each cell of it once, so it is the whole axis.
+    """
+    n = counts.shape[axis]
+    width = 2 * radius + 1
+    if wrap and width >= n:
+        return np.broadcast_to(counts.sum(axis=axis, keepdims=True), counts.shape).copy()
+    pad = [(0, 0)] * counts.ndim
+    pad[axis] = (radius + 1, radius)
+    table = np.pad(counts, pad, mode='wrap' if wrap else 'constant').cumsum(axis=axis)
+    return (np.take(table, range(width, width + n), axis=axis)
+            - np.take(table, range(n), axis=axis))
+
+
+def box_sum(counts: np.ndarray, radius: int, wrap: bool = False) -> np.ndarray:
+    """Sum of counts over the (2 * radius + 1)-wide square around each
+    cell, clipped at the edges of the grid, from running totals along
+    each axis in turn.
+
+    Args:
+        counts: a 2-D array of counts (e.g., a boolean mask)
+        radius: how many steps away from a cell to include
+        wrap: wrap around the edges instead; each cell is counted once
+            even if the square is wider than the grid
+
+    Returns:
+        An int32 array shaped like counts.
+    """
+    rows = _window_sum(counts.astype(np.int32), radius, wrap, axis=0)
+    return _window_sum(rows, radius, wrap, axis=1)
+
+
+class ArrayPopulation(observer.Observable):
+    """A population on a grid of cells, each empty or holding one person,
+    stored as arrays. Offers the same step/tick/seed interface as
+    model.Population.
+    """
+    def __init__(self, num_rows: int, num_cols: int, num_people: int,
+                 rng: streams.RandomStream = None):
+        """Initialize the population with a grid of num_rows x num_cols
+        cells and num_people randomly located susceptible individuals.
+
+        Args:
+            num_rows: The number of rows in the grid.
+            num_cols: The number of columns in the grid.
+            num_people: The initial number of people in the population.
+            rng: The source of every random draw in the simulation (a freshly
+                seeded one by default).
+        """
+        super().__init__()
+        self._step_num = 0
+        self._nrows = num_rows
+        self._ncols = num_cols
+        self.rng = rng if rng is not None else streams.RandomStream()
+        self._generator = self.rng.generator
+
+        num_cells = num_rows * num_cols
+        cells = self._generator.choice(num_cells, size=min(num_people, num_cells), replace=False)
+        self.occupied = np.zeros((num_rows, num_cols), dtype=bool)
+        self.occupied.flat[cells] = True
+        self.health = np.where(self.occupied, Health.SUSCEPTIBLE.value, EMPTY).astype(np.int8)
+        self.next_health = self.health.copy()
+        self.time_in_state = np.zeros((num_rows, num_cols), dtype=np.int32)
+
+        # Parameters
+        self.config = config.DISEASE
+        self.social = config.SOCIAL
+
+    def __str__(self) -> str:
+        """Returns a string representation of the population"""
+        return '\n'.join(''.join(row) for row in _CHARS[self.health]) + '\n'
+
+    def get_health(self, row: int, col: int) -> Health:
+        """Return the health of the individual at the specified row
+        and column, or None if the cell is empty"""
+        if row < 0 or row >= self._nrows or col < 0 or col >= self._ncols:
+            raise ValueError("Invalid row or column")
+        code = self.health[row, col]
+        return None if code == EMPTY else Health(code)
+
+    def counts(self) -> Dict[Health, int]:
+        """Returns the number of individuals in each health state"""
+        totals = np.bincount(self.health.ravel(), minlength=len(Health) + 1)
+        return {health: int(totals[health.value]) for health in Health}
+
+    def snapshot(self) -> np.ndarray:
+        """Returns the health of every cell, row by row, as Health values
+        (EMPTY for an empty cell)"""
+        return self.health.ravel().copy()
+
+    def seed(self, num_sick: int = config.POPULATION['N_Infected']):
+        """Select a random subset of the individuals and make them sick.
+
+        Args:
+            num_sick: The number of sick individuals to select.
+        """
+        people = np.flatnonzero(self.occupied)
+        sick = self._generator.choice(people, size=min(num_sick, len(people)), replace=False)
+        self.health.flat[sick] = Health.INFECTED.value
+        self.next_health.flat[sick] = Health.INFECTED.value
+
+    def infection_probability(self, num_infected: np.ndarray) -> np.ndarray:
+        """Chance of a susceptible person becoming infected in one step,
+        given the number of infected neighbors within Visit_Dist.
+        """
+        p_contact = self.social['P_Visit'] * self.social['P_Greet'] * self.config['P_Transmit']
+        max_neighbors = (2 * self.social['Visit_Dist'] + 1) ** 2
+        exponent = 2 * self.social['N_Visits'] * np.arange(max_neighbors + 1)
+        table = 1.0 - (1.0 - p_contact) ** exponent
+        return table[num_infected]
+
+    def step(self):
+        """Work out the next health state of every individual at once.
+        Observers are not notified until tick() applies the changes."""
+        infected = self.health == Health.INFECTED.value
+        np.copyto(self.next_health, self.health)
+
+        # Recoveries, then deaths among those not recovering
+        rows, cols = np.nonzero(infected)
+        recover = self.time_in_state[rows, cols] > self.config['T_Recover']
+        self.next_health[rows[recover], cols[recover]] = Health.RECOVERED.value
+        rows, cols = rows[~recover], cols[~recover]
+        die = self._generator.random(len(rows)) < self.config['P_Death']
+        self.next_health[rows[die], cols[die]] = Health.DEAD.value
+
+        # Transmissions, drawn only for susceptible people near someone infected
+        if len(recover):
+            num_infected = box_sum(infected, self.social['Visit_Dist'],
+                                   wrap=config.GRID.get('Torus', False))
+            exposed = (self.health == Health.SUSCEPTIBLE.value) & (num_infected > 0)
+            rows, cols = np.nonzero(exposed)
+            p = self.infection_probability(num_infected[rows, cols])
+            caught = self._generator.random(len(rows)) < p
+            self.next_health[rows[caught], cols[caught]] = Health.INFECTED.value
+
+    def tick(self):
+        """Advance the time step for the whole grid. Observers get the
+        step's state changes as one observer.Transitions event, with each
+        individual identified by its flat cell index."""
+        self._step_num += 1
+        self.time_in_state += 1
+        changed = self.next_health != self.health
+        self.time_in_state[changed] = 0
+        if self.has_observers():
+            cells = np.flatnonzero(changed)
+            old = [Health(code) for code in self.health.flat[cells]]
+            new = [Health(code) for code in self.next_health.flat[cells]]
+            event = observer.Transitions(self._step_num, cells.tolist(), old, new)
+        np.copyto(self.health, self.next_health)
+        if self.has_observers():
+            self.notify_all(event)
@@ -32,19 +32,34 @@ class TextView(View):
         """Add a string to the contents list."""
         self.contents.append(info)
         
-    def receive_notification(self, subject: observer.Observable, event: str):
+    def receive_notification(self, subject: observer.Observable, event):
         """Receive notifications from objects that are being observed,
-        for example the model.
-        
+        for example the model. What is printed must describe the subject
+        as it was when notified, so a batch of transitions is copied now
+        (ids, old and new states) and only formatted if it is printed;
+        any other event is formatted straight away.
+
         Args:
             subject: the Observable object that has changed
             event: the event that occurred
         """
-        self.add_info(f"{subject} changed: {event}")
+        if isinstance(event, observer.Transitions):
+            self.contents.append((type(subject).__name__,
+                                  observer.Transitions(event.time, tuple(event.ids),
+                                                       tuple(event.old), tuple(event.new))))
+        else:
+            self.contents.append(f"{subject} changed: {event}")
+
+    @staticmethod
+    def _format(item) -> str:
+        if isinstance(item, tuple):
+            name, transitions = item
+            return f"{name} changed: {transitions}"
+        return item
         
     def update(self):
         """Print all the accumulated contents, one element per line."""
-        print('\n'.join(self.contents))
+        print('\n'.join(self._format(item) for item in self.contents))
         time.sleep(self.delay)
         
     def clear(self):
@@ -0,0 +1,116 @@
+"""
+Batch solving of many puzzles across a pool of worker processes.
+
+A batch is described by a single specification, which may be
+  - a directory, meaning every .sdk file in it,
+  - a glob pattern such as "data/*.sdk", or
+  - a multi-puzzle file as read by sdk_reader.iter_puzzles
+    (one puzzle per line, 81 symbols for 9x9, or SadMan blocks
+    separated by blank lines; optionally gzipped).
+Results come back in input order, each with its solving time.
+"""
+
+from sdk_config import UNKNOWN
+import sdk_board
+import sdk_reader
+import sdk_bitboard
+import sdk_dlx
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+import collections
+import glob
+import itertools
+import os
+import time
+
+import logging
+logging.basicConfig()
+log = logging.getLogger(__name__)
+log.setLevel(logging.INFO)
+
+# Solving engines by name; each solves an sdk_board.Board in place
+ENGINES = {
+    "search": lambda board: board.solve(),
+    "bits": sdk_bitboard.solve,
+    "dlx": sdk_dlx.solve,
+}
+
+CHUNK_SIZE = 32     # Puzzles sent to a worker at a time
+
+
+class Result(NamedTuple):
+    name: str
+    solved: bool
+    solution: List[str]
+    seconds: float
+
+
+def puzzles(spec: str) -> Iterator[Tuple[str, List[str]]]:
+    """(name, rows) for each puzzle named by spec, in order"""
+    if os.path.isdir(spec):
+        paths = sorted(glob.glob(os.path.join(spec, "*.sdk")))
+    elif any(c in spec for c in "*?["):
+        paths = sorted(glob.glob(spec))
+    else:
+        for num, rows in enumerate(sdk_reader.iter_puzzles(spec), start=1):
+            yield f"{spec}:{num}", rows
+        return
+    for path in paths:
+        yield path, sdk_reader.read(path).as_list()
+
+
+def solve_puzzle(name: str, rows: List[str], engine: str = "search") -> Result:
+    """Solve one puzzle (in a worker process)"""
+    start = time.perf_counter()
+    board = sdk_board.Board()
+    board.set_tiles(rows)
+    solved = False
+    if board.is_consistent():
+        ENGINES[engine](board)
+        solved = board.is_consistent() and UNKNOWN not in "".join(board.as_list())
+    return Result(name, solved, board.as_list(), time.perf_counter() - start)
+
+
+def _solve_chunk(chunk: List[Tuple[str, List[str]]], engine: str) -> List[Result]:
+    return [solve_puzzle(name, rows, engine) for name, rows in chunk]
+
+
+def solve_all(spec: str, engine: str = "search",
+              workers: Optional[int] = None) -> Iterator[Result]:
+    """Solve every puzzle named by spec in a pool of worker
+    processes, yielding results in input order as they become
+    available.  Only a few chunks per worker are in flight at a
+    time, so arbitrarily long inputs are streamed.
+    """
+    source = puzzles(spec)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        window = 2 * (workers or os.cpu_count() or 1)
+        in_flight = collections.deque()
+        while True:
+            while len(in_flight) < window:
+                chunk = list(itertools.islice(source, CHUNK_SIZE))
+                if not chunk:
+                    break
+                in_flight.append(pool.submit(_solve_chunk, chunk, engine))
+            if not in_flight:
+                return
+            yield from in_flight.popleft().result()
+
+
+def run(spec: str, engine: str = "search", workers: Optional[int] = None):
+    """Solve a batch, printing one line per puzzle:
+    name, status, seconds, and the solution on one line.
+    """
+    count = solved = 0
+    total = 0.0
+    start = time.perf_counter()
+    for result in solve_all(spec, engine, workers):
+        count += 1
+        solved += result.solved
+        total += result.seconds
+        status = "solved" if result.solved else "FAILED"
+        print(f"{result.name}\t{status}\t{result.seconds:.4f}\t{''.join(result.solution)}")
+    elapsed = time.perf_counter() - start
+    log.info(f"{solved}/{count} puzzles solved in {elapsed:.2f}s "
+             f"({total:.2f}s of solver time)")
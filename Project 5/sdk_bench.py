@@ -0,0 +1,142 @@
+"""
+Solver benchmark.  Runs a solving engine over one or more corpora
+of puzzles (any file sdk_reader.iter_puzzles can read) and reports,
+per corpus, puzzles per second, median and 99th percentile latency,
+and per-puzzle averages of the solver's own counters: propagation
+passes, groups examined, candidates eliminated, guesses and
+backtracks.  The report can be written as JSON and compared against
+an earlier report to catch regressions.
+
+    python3 sdk_bench.py easy=data/easy.txt hard=data/hard.txt.gz \\
+        17-clue=data/17clue.txt --json bench.json
+    python3 sdk_bench.py hard=data/hard.txt --baseline bench.json
+
+Board dimensions come from sdk_config, so a 16x16 corpus must be run
+separately with ROOT = 4.
+"""
+
+import sdk_board
+import sdk_reader
+from sdk_batch import ENGINES
+
+from typing import Dict, List, Optional
+import argparse
+import itertools
+import json
+import sys
+import time
+
+import logging
+logging.basicConfig()
+log = logging.getLogger(__name__)
+log.setLevel(logging.INFO)
+
+# Counters from Board.stats reported per puzzle
+COUNTERS = ["propagations", "groups_examined", "guesses", "backtracks"]
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of values"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, int(fraction * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def bench_corpus(path: str, engine: str = "search",
+                 limit: Optional[int] = None) -> Dict[str, float]:
+    """Solve each puzzle in path (up to limit) and summarize"""
+    latencies = []
+    totals = dict.fromkeys(COUNTERS + ["eliminated"], 0)
+    solved = 0
+    for rows in itertools.islice(sdk_reader.iter_puzzles(path), limit):
+        board = sdk_board.Board()
+        board.set_tiles(rows)
+        eliminated = board.index.eliminated
+        start = time.perf_counter()
+        ENGINES[engine](board)
+        latencies.append(time.perf_counter() - start)
+        solved += board.is_complete()
+        totals["eliminated"] += board.index.eliminated - eliminated
+        for name in COUNTERS:
+            totals[name] += board.stats[name]
+    count = len(latencies)
+    elapsed = sum(latencies)
+    result = {
+        "puzzles": count,
+        "solved": solved,
+        "seconds": elapsed,
+        "puzzles_per_sec": count / elapsed if elapsed else 0.0,
+        "p50_ms": 1000 * percentile(latencies, 0.50),
+        "p99_ms": 1000 * percentile(latencies, 0.99),
+    }
+    for name, total in totals.items():
+        result[f"{name}_per_puzzle"] = total / count if count else 0.0
+    return result
+
+
+def regressions(report: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Ways in which report is worse than baseline by more than
+    the tolerance fraction: slower, or more search.
+    """
+    problems = []
+    for corpus, now in report["corpora"].items():
+        before = baseline.get("corpora", {}).get(corpus)
+        if before is None:
+            continue
+        if now["puzzles_per_sec"] < before["puzzles_per_sec"] * (1 - tolerance):
+            problems.append(f"{corpus}: {now['puzzles_per_sec']:.1f} puzzles/sec, "
+                            f"was {before['puzzles_per_sec']:.1f}")
+        for name in ["guesses_per_puzzle", "backtracks_per_puzzle"]:
+            if now[name] > before[name] * (1 + tolerance) + 1e-9:
+                problems.append(f"{corpus}: {name} {now[name]:.2f}, was {before[name]:.2f}")
+        if now["solved"] < now["puzzles"]:
+            problems.append(f"{corpus}: solved only {now['solved']} of {now['puzzles']}")
+    return problems
+
+
+def cli() -> object:
+    """Get arguments from the command line"""
+    parser = argparse.ArgumentParser(description="Sudoku solver benchmark")
+    parser.add_argument("corpora", nargs="+", metavar="NAME=PATH",
+                        help="Corpus name and puzzle file")
+    parser.add_argument("-e", "--engine", choices=sorted(ENGINES), default="search")
+    parser.add_argument("-n", "--limit", type=int, default=None,
+                        help="Puzzles per corpus (default: all)")
+    parser.add_argument("--json", type=argparse.FileType("w"), default=None,
+                        help="Write the report as JSON ('-' for stdout)")
+    parser.add_argument("--baseline", type=argparse.FileType("r"), default=None,
+                        help="Earlier JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Allowed slowdown fraction against the baseline")
+    return parser.parse_args()
+
+
+def main():
+    args = cli()
+    # Per-tile debug logging would dominate the timings
+    logging.getLogger(sdk_board.__name__).setLevel(logging.INFO)
+    report = {"engine": args.engine, "corpora": {}}
+    for spec in args.corpora:
+        name, _, path = spec.rpartition("=")
+        name = name or path
+        result = bench_corpus(path, args.engine, args.limit)
+        report["corpora"][name] = result
+        print(f"{name:12} {result['puzzles']:7d} puzzles "
+              f"{result['puzzles_per_sec']:9.1f}/s  "
+              f"p50 {result['p50_ms']:8.2f}ms  p99 {result['p99_ms']:8.2f}ms  "
+              f"guesses {result['guesses_per_puzzle']:7.2f}  "
+              f"backtracks {result['backtracks_per_puzzle']:7.2f}")
+    if args.json:
+        json.dump(report, args.json, indent=2)
+    if args.baseline:
+        problems = regressions(report, json.load(args.baseline), args.tolerance)
+        for problem in problems:
+            log.error(f"Regression: {problem}")
+        if problems:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Bitmask Sudoku engine.  An alternative to the Tile/Board object
+graph in sdk_board for bulk solving: each cell's candidates are an
+integer with one bit per symbol in CHOICES, and the values already
+used in each row, column and block are kept as masks, so eliminating
+candidates is a few bitwise operations per cell instead of set
+construction.
+
+Load a board with BitBoard.from_board, solve it, and copy the result
+back into the sdk_board.Tile objects with to_board.  A BitBoard is not
+tied to the ROOT in sdk_config: BitBoard(root=5) is a 25x25 board,
+with geometry tables shared through sdk_layout.
+"""
+
+from sdk_config import CHOICES, UNKNOWN, ROOT
+import sdk_board
+import sdk_layout
+from typing import List, Optional, Sequence, Iterator
+
+import logging
+logging.basicConfig()
+log = logging.getLogger(__name__)
+log.setLevel(logging.INFO)
+
+
+def popcount(mask: int) -> int:
+    """Number of candidates in mask"""
+    return bin(mask).count("1")
+
+
+def lowest_bit(mask: int) -> int:
+    """The lowest set bit of mask (0 if mask is empty)"""
+    return mask & -mask
+
+
+def bits(mask: int) -> Iterator[int]:
+    """Each set bit of mask, lowest first"""
+    while mask:
+        bit = mask & -mask
+        yield bit
+        mask ^= bit
+
+
+class BitBoard(object):
+    """A Sudoku board as flat lists of bitmasks.
+    values[cell] is the bit of the cell's symbol, or 0 if unknown.
+    candidates[cell] is the mask of symbols the cell could still hold.
+    rows, cols, blocks are the masks of symbols already placed in each group.
+    Cells are numbered as in sdk_layout, cell = row * size + col.
+    """
+
+    def __init__(self, root: int = ROOT, choices: Optional[str] = None):
+        """The empty board.  Symbols default to CHOICES for the
+        configured ROOT and to sdk_layout.symbols otherwise.
+        """
+        if choices is None:
+            choices = CHOICES if root == ROOT else sdk_layout.symbols(root)
+        self.layout = sdk_layout.layout(root)
+        self.size = size = self.layout.size
+        assert len(choices) == size
+        self.choices = choices
+        self.all = (1 << size) - 1     # Every symbol is still a candidate
+        # Bit i stands for the symbol choices[i]
+        self.bit = {sym: 1 << i for i, sym in enumerate(choices)}
+        self.symbol = {1 << i: sym for i, sym in enumerate(choices)}
+        self.values: List[int] = [0] * self.layout.ncells
+        self.candidates: List[int] = [self.all] * self.layout.ncells
+        self.rows: List[int] = [0] * size
+        self.cols: List[int] = [0] * size
+        self.blocks: List[int] = [0] * size
+
+    @classmethod
+    def from_list(cls, tile_values: Sequence[Sequence[str]], root: int = ROOT,
+                  choices: Optional[str] = None) -> "BitBoard":
+        """Build from rows of symbols, as produced by sdk_board.Board.as_list.
+        Raises ValueError if the givens repeat a symbol within a group.
+        """
+        board = cls(root, choices)
+        size = board.size
+        for row in range(size):
+            for col in range(size):
+                sym = tile_values[row][col]
+                if sym != UNKNOWN and not board.place(row * size + col, board.bit[sym]):
+                    raise ValueError(f"Duplicate {sym} at {row},{col}")
+        return board
+
+    @classmethod
+    def from_board(cls, board: sdk_board.Board) -> "BitBoard":
+        """Build from the tile values of an sdk_board.Board"""
+        return cls.from_list(board.as_list())
+
+    def to_board(self, board: sdk_board.Board):
+        """Write known values back into the tiles of board"""
+        for row in range(self.size):
+            for col in range(self.size):
+                value = self.values[row * self.size + col]
+                tile = board.tiles[row][col]
+                if value and tile.value == UNKNOWN:
+                    tile.set_value(self.symbol[value])
+
+    def as_list(self) -> List[str]:
+        """Tile values in a format compatible with sdk_board.Board.set_tiles"""
+        size = self.size
+        return ["".join(self.symbol.get(self.values[row * size + col], UNKNOWN)
+                        for col in range(size))
+                for row in range(size)]
+
+    def __str__(self) -> str:
+        """In Sadman Sudoku format"""
+        return "\n".join(self.as_list())
+
+    def _save(self) -> tuple:
+        return (self.values[:], self.candidates[:],
+                self.rows[:], self.cols[:], self.blocks[:])
+
+    def _restore(self, saved: tuple):
+        (self.values, self.candidates,
+         self.rows, self.cols, self.blocks) = saved
+
+    def place(self, cell: int, bit: int) -> bool:
+        """Put the symbol for bit in cell.  Returns False (and changes
+        nothing) if a peer already holds that symbol.
+        """
+        layout = self.layout
+        row, col, block = layout.row_of[cell], layout.col_of[cell], layout.block_of[cell]
+        if (self.rows[row] | self.cols[col] | self.blocks[block]) & bit:
+            return False
+        self.values[cell] = bit
+        self.candidates[cell] = bit
+        self.rows[row] |= bit
+        self.cols[col] |= bit
+        self.blocks[block] |= bit
+        return True
+
+    def is_complete(self) -> bool:
+        return all(self.values)
+
+    def propagate(self) -> bool:
+        """Naked and hidden singles until nothing changes.
+        Returns False if the board has become inconsistent
+        (a cell or a group ran out of places for a symbol).
+        """
+        values, candidates = self.values, self.candidates
+        rows, cols, blocks = self.rows, self.cols, self.blocks
+        row_of, col_of, block_of = (self.layout.row_of, self.layout.col_of,
+                                    self.layout.block_of)
+        every = self.all
+        progress = True
+        while progress:
+            progress = False
+            # Naked single: mask out symbols used by the cell's groups
+            for cell in range(self.layout.ncells):
+                if values[cell]:
+                    continue
+                cands = candidates[cell] & ~(rows[row_of[cell]]
+                                             | cols[col_of[cell]]
+                                             | blocks[block_of[cell]])
+                if cands == 0:
+                    return False
+                candidates[cell] = cands
+                if cands & (cands - 1) == 0:
+                    self.place(cell, cands)
+                    progress = True
+            # Hidden single: a symbol with one possible cell in a group
+            for group in self.layout.groups:
+                once = twice = placed = 0
+                for cell in group:
+                    if values[cell]:
+                        placed |= values[cell]
+                    else:
+                        twice |= once & candidates[cell]
+                        once |= candidates[cell]
+                if (once | placed) != every:
+                    return False
+                hidden = once & ~twice & ~placed
+                if not hidden:
+                    continue
+                for cell in group:
+                    bit = candidates[cell] & hidden
+                    if bit and not values[cell]:
+                        if bit & (bit - 1) or not self.place(cell, bit):
+                            return False
+                        progress = True
+        return True
+
+    def min_choice_cell(self) -> Optional[int]:
+        """An unknown cell with the fewest candidates, or None
+        if every cell is known.
+        """
+        best, best_count = None, self.size + 1
+        for cell in range(self.layout.ncells):
+            if not self.values[cell]:
+                count = popcount(self.candidates[cell])
+                if count < best_count:
+                    best, best_count = cell, count
+                    if count <= 2:
+                        break
+        return best
+
+    def solve(self) -> bool:
+        """Constraint propagation with guess-and-check.
+        Returns True if the board is complete, False if it has no solution
+        (in which case its state is unspecified).
+        """
+        if not self.propagate():
+            return False
+        cell = self.min_choice_cell()
+        if cell is None:
+            return True
+        for bit in bits(self.candidates[cell]):
+            saved = self._save()
+            if self.place(cell, bit) and self.solve():
+                return True
+            self._restore(saved)
+        return False
+
+    def count_solutions(self, limit: Optional[int] = None) -> int:
+        """Number of solutions, stopping once limit is reached
+        (limit=2 is enough to tell whether the solution is unique).
+        The board is left as it was.
+        """
+        saved = self._save()
+        count = self._count(limit)
+        self._restore(saved)
+        return count
+
+    def _count(self, limit: Optional[int]) -> int:
+        if not self.propagate():
+            return 0
+        cell = self.min_choice_cell()
+        if cell is None:
+            return 1
+        count = 0
+        for bit in bits(self.candidates[cell]):
+            saved = self._save()
+            if self.place(cell, bit):
+                count += self._count(None if limit is None else limit - count)
+            self._restore(saved)
+            if limit is not None and count >= limit:
+                break
+        return count
+
+
+def solve(board: sdk_board.Board) -> bool:
+    """Solve board with the bitmask engine, writing the solution
+    into its tiles.  Returns True if a solution was found.
+    """
+    try:
+        bit_board = BitBoard.from_board(board)
+    except ValueError as e:
+        log.debug(f"Inconsistent board: {e}")
+        return False
+    if not bit_board.solve():
+        return False
+    bit_board.to_board(board)
+    return True
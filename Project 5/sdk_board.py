@@ -1,6 +1,10 @@
 from sdk_config import CHOICES, UNKNOWN, ROOT
 from sdk_config import NROWS, NCOLS
-from typing import Sequence, List, Set
+import sdk_layout
+from typing import Sequence, List, Set, Iterable, Optional, Tuple, Callable
+import collections
+import itertools
+import contextlib
 import logging
 import enum
 
@@ -74,6 +78,103 @@ class Observable:
             observer.notify(event)
 
 
+class EventBatch(object):
+    """Tile change notifications held back while deferred and then
+    delivered together, one event per changed tile, so that an
+    attached view sees each round of propagation once.
+    """
+
+    def __init__(self):
+        self._depth = 0
+        self._pending = {}      # Tiles in order of first change
+
+    @property
+    def deferring(self) -> bool:
+        return self._depth > 0
+
+    def add(self, tile: "Tile"):
+        self._pending[tile] = True
+
+    @contextlib.contextmanager
+    def deferred(self):
+        """Hold notifications until the outermost deferral ends"""
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                self.flush()
+
+    def flush(self):
+        pending, self._pending = self._pending, {}
+        for tile in pending:
+            tile.notify_all(TileEvent(tile, EventKind.TileChanged))
+
+
+class WorkQueue(object):
+    """Indices of groups waiting to be re-examined by constraint
+    propagation.  A group is queued at most once until it is popped.
+    """
+
+    def __init__(self):
+        self._pending = collections.deque()
+        self._queued = set()
+
+    def push(self, group_ids: Iterable[int]):
+        for group_id in group_ids:
+            if group_id not in self._queued:
+                self._queued.add(group_id)
+                self._pending.append(group_id)
+
+    def pop(self) -> int:
+        group_id = self._pending.popleft()
+        self._queued.discard(group_id)
+        return group_id
+
+    def clear(self):
+        self._pending.clear()
+        self._queued.clear()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+
+class CandidateIndex(object):
+    """Unknown tiles bucketed by their number of candidates,
+    kept up to date as tiles change, so the search can find
+    a tile with the fewest candidates without scanning the board.
+    Since it sees every change, it also counts the candidates
+    eliminated from unknown tiles.
+    """
+
+    def __init__(self):
+        self.buckets = [{} for _ in range(len(CHOICES) + 1)]
+        self._bucket_of = {}
+        self.eliminated = 0
+
+    def update(self, tile: "Tile"):
+        """Move tile to the bucket for its current state"""
+        old = self._bucket_of.pop(tile, None)
+        if old is not None:
+            del self.buckets[old][tile]
+        count = len(tile.candidates) if tile.value == UNKNOWN else 1
+        if old is not None and count < old:
+            self.eliminated += old - count
+        if tile.value == UNKNOWN:
+            self.buckets[count][tile] = True
+            self._bucket_of[tile] = count
+
+    def fewest(self) -> List["Tile"]:
+        """The unknown tiles with the fewest candidates (which may
+        be none at all, if the board is inconsistent)
+        """
+        for bucket in self.buckets:
+            if bucket:
+                return list(bucket)
+        return []
+
+
 class Tile(Observable):
     """One tile on the Sudoku grid.
     Public attributes (read-only): value, which will be either
@@ -85,6 +186,12 @@ class Tile(Observable):
     value is a public read-only attribute; change it
     only through the access method set_value or indirectly
     through method remove_candidates.
+    A tile that belongs to a Board also knows the indices of its
+    groups and the board's work queue, so that every change queues
+    those groups for propagation, the board's trail, on which
+    it records its prior state before every change, the board's
+    event batch, which may hold back notifications, and the board's
+    candidate index, which it keeps informed of its candidate count.
     """
 
     def __init__(self, row: int, col: int, value=UNKNOWN):
@@ -92,6 +199,12 @@ class Tile(Observable):
         assert value == UNKNOWN or value in CHOICES
         self.row = row
         self.col = col
+        self.cell = row * NCOLS + col     # Index in sdk_layout tables
+        self.group_ids: List[int] = []
+        self.queue: Optional[WorkQueue] = None
+        self.trail: Optional[List[tuple]] = None
+        self.batch: Optional[EventBatch] = None
+        self.index: Optional[CandidateIndex] = None
         self.set_value(value)
 
     def set_value(self, value: str):
@@ -102,13 +215,44 @@ class Tile(Observable):
         Checks if the value is in CHOICES or UNKNOWN.
         It then sets the value according it the cateogry it is in.
         """
+        self._record()
         if value in CHOICES:
             self.value = value
             self.candidates = {value}
         else:
             self.value = UNKNOWN
             self.candidates = set(CHOICES)
-        self.notify_all(TileEvent(self, EventKind.TileChanged))
+        self._enqueue_groups()
+        self._reindex()
+        self._changed()
+
+    def _record(self):
+        """Save our state on the trail so a search can undo the change.
+        Candidate sets are replaced, never modified in place, so
+        keeping a reference is enough.
+        """
+        if self.trail is not None:
+            self.trail.append((self, self.value, self.candidates))
+
+    def _enqueue_groups(self):
+        """Our groups need another look from propagation"""
+        if self.queue is not None:
+            self.queue.push(self.group_ids)
+
+    def _reindex(self):
+        if self.index is not None:
+            self.index.update(self)
+
+    def _changed(self):
+        """Tell observers we changed.  Headless solving has no
+        observers, so we skip building the event at all.
+        """
+        if not self.observers:
+            return
+        if self.batch is not None and self.batch.deferring:
+            self.batch.add(self)
+        else:
+            self.notify_all(TileEvent(self, EventKind.TileChanged))
 
     def could_be(self, value: str) -> bool:
         """
@@ -143,10 +287,15 @@ class Tile(Observable):
         if new_candidates == self.candidates:
             # Didn't remove any candidates
             return False
+        self._record()
         self.candidates = new_candidates
         if len(self.candidates) == 1:
-            self.set_value(new_candidates.pop())
-        self.notify_all(TileEvent(self, EventKind.TileChanged))
+            # set_value queues our groups and notifies
+            self.set_value(next(iter(new_candidates)))
+        else:
+            self._enqueue_groups()
+            self._reindex()
+            self._changed()
         return True
 
 
@@ -155,34 +304,68 @@ class Board(object):
 
     def __init__(self):
         """The empty board"""
-        # Row/Column structure: Each row contains columns
-        self.tiles: List[List[Tile]] = [ ]
-
-        for row in range(NROWS):
-            cols = [ ]
-            for col in range(NCOLS):
-                cols.append(Tile(row, col))
-            self.tiles.append(cols)
-        self.groups: List[List[Tile]] = []
+        # Tiles are also kept in a flat list, indexed like the
+        # cached group and peer tables in sdk_layout
+        self.layout = sdk_layout.layout(ROOT)
+        self.cells: List[Tile] = [Tile(row, col) for row, col
+                                  in zip(self.layout.row_of, self.layout.col_of)]
 
-        for row in self.tiles:
-            self.groups.append(row)
-
-        for col in range(len(self.tiles[0])):
-            group = []
-            for row in range(len(self.tiles)):
-                group.append(self.tiles[row][col])
-            self.groups.append(group)
-
-        for block_row in range(ROOT):
-            for block_col in range(ROOT):
-                group = []
-                for row in range(ROOT):
-                    for col in range(ROOT):
-                        row_addr = (ROOT * block_row) + row
-                        col_addr = (ROOT * block_col) + col
-                        group.append(self.tiles[row_addr][col_addr])
-                self.groups.append(group)
+        # Row/Column structure: Each row contains columns
+        self.tiles: List[List[Tile]] = [self.cells[row * NCOLS:(row + 1) * NCOLS]
+                                        for row in range(NROWS)]
+
+        # Rows, then columns, then blocks
+        self.groups: List[List[Tile]] = [[self.cells[cell] for cell in group]
+                                         for group in self.layout.groups]
+
+        # Propagation only revisits groups in which a tile changed;
+        # initially that is all of them.  Every tile change is also
+        # logged on the trail, so that search can back out of a guess.
+        self.queue = WorkQueue()
+        self.trail: List[tuple] = []
+        self.events = EventBatch()
+        self.index = CandidateIndex()
+        for group_id, group in enumerate(self.groups):
+            for tile in group:
+                tile.group_ids.append(group_id)
+                tile.queue = self.queue
+                tile.trail = self.trail
+                tile.batch = self.events
+                tile.index = self.index
+        for tile in self.cells:
+            self.index.update(tile)
+        self.queue.push(range(len(self.groups)))
+
+        # Branching heuristics for solve: break ties between tiles
+        # with fewest candidates by most unknown peers (degree), and
+        # try values that rule out the fewest peer candidates first
+        # (least constraining value).
+        self.degree_tiebreak = True
+        self.lcv = True
+
+        # If set, solve polls this between guesses and gives up
+        # (returning False) once it returns True
+        self.should_stop: Optional[Callable[[], bool]] = None
+
+        # Rows, then columns, then blocks
+        self.lines = self.groups[:NROWS + NCOLS]
+        self.blocks = self.groups[NROWS + NCOLS:]
+
+        # Tactics tried in order by propagate once naked and hidden
+        # singles are exhausted; add to or reorder the list to change
+        # the pipeline.  Each returns True if it removed a candidate.
+        self.tactics: List[Tuple[str, Callable[[], bool]]] = [
+            ("naked_pair", lambda: self.naked_subset(2)),
+            ("hidden_pair", lambda: self.hidden_subset(2)),
+            ("pointing", self.pointing),
+            ("box_line", self.box_line),
+            ("naked_triple", lambda: self.naked_subset(3)),
+            ("hidden_triple", lambda: self.hidden_subset(3)),
+        ]
+        # How many times each tactic made progress, how many
+        # times propagate ran and how many groups it examined, and
+        # how many guesses and backtracks solve made
+        self.stats = collections.Counter()
 
     def set_tiles(self, tile_values: Sequence[Sequence[str]]):
         """
@@ -194,6 +377,24 @@ class Board(object):
             for col_num in range(NCOLS):
                 tile = self.tiles[row_num][col_num]
                 tile.set_value(tile_values[row_num][col_num])
+        # A freshly loaded board has no history to undo
+        self.trail.clear()
+
+    def undo(self, mark: int):
+        """Unwind tile changes back to the point where the trail
+        had length mark.  Each restored tile is notified once.
+        """
+        restored = {}
+        while len(self.trail) > mark:
+            tile, value, candidates = self.trail.pop()
+            tile.value = value
+            tile.candidates = candidates
+            restored[tile] = True
+        # The state we return to was already propagated
+        self.queue.clear()
+        for tile in restored:
+            tile._reindex()
+            tile._changed()
 
     def __str__(self) -> str:
         """In Sadman Sudoku format"""
@@ -208,15 +409,17 @@ class Board(object):
         Returns False if it is, adds the tile to symbols variable if not.
         Returns True otherweise. 
         """
-        for group in self.groups:
+        values = [tile.value for tile in self.cells]
+        for group in self.layout.groups:
             symbols = set({})
-            for tile in group:
-                log.debug(f"Duplicate {tile.value} in {group}")
-                if tile.value in CHOICES:
-                    if tile.value in symbols:
+            for cell in group:
+                value = values[cell]
+                if value != UNKNOWN:
+                    if value in symbols:
+                        log.debug(f"Duplicate {value} in group {group}")
                         return False
                     else:
-                        symbols.add(tile.value)
+                        symbols.add(value)
         return True
 
     def solve(self):
@@ -230,26 +433,83 @@ class Board(object):
         if not self.is_consistent():
             return False
         else:
-            board = self.as_list()
+            mark = len(self.trail)
             rand_tile = self.min_choice_tile()
-            for value in rand_tile.candidates:
+            for value in self.ordered_candidates(rand_tile):
+                if self.should_stop is not None and self.should_stop():
+                    return False
+                self.stats["guesses"] += 1
                 rand_tile.set_value(value)
                 if self.solve():
                     return True
                 else:
-                    self.set_tiles(board)
+                    self.stats["backtracks"] += 1
+                    self.undo(mark)
         return False
 
+    def count_solutions(self, limit: Optional[int] = None) -> int:
+        """Number of solutions, searching on past the first one
+        and stopping once limit is reached (limit=2 is enough to
+        tell whether the solution is unique).  Uses the same
+        propagation and branching as solve; the board is left
+        as it was.
+        """
+        mark = len(self.trail)
+        count = self._count(limit)
+        self.undo(mark)
+        # undo forgets queued groups; the original state may not
+        # have been propagated yet
+        self.queue.push(range(len(self.groups)))
+        return count
+
+    def _count(self, limit: Optional[int]) -> int:
+        self.propagate()
+        if not self.is_consistent():
+            return 0
+        tile = self.min_choice_tile()
+        if tile is None:
+            return 1
+        count = 0
+        mark = len(self.trail)
+        for value in self.ordered_candidates(tile):
+            self.stats["guesses"] += 1
+            tile.set_value(value)
+            count += self._count(None if limit is None else limit - count)
+            self.undo(mark)
+            if limit is not None and count >= limit:
+                break
+        return count
+
+    def is_unique(self) -> bool:
+        """The board has exactly one solution"""
+        return self.count_solutions(limit=2) == 1
+
     def propagate(self):
         """Repeat solution tactics until we
         don't make any progress, whether or not
-        the board is solved.
+        the board is solved.  Only groups on the work
+        queue (those in which some tile changed) are
+        examined; changes they cause queue further groups.
+        When the singles run dry, the first tactic in
+        self.tactics that makes progress gets us going again.
+        Observers hear about each changed tile once, at the end.
         """
-        progress = True
-        while progress:
-            progress = self.naked_single()
-            self.hidden_single()
-        return
+        self.stats["propagations"] += 1
+        with self.events.deferred():
+            while True:
+                while self.queue:
+                    self.stats["groups_examined"] += 1
+                    group = self.groups[self.queue.pop()]
+                    if self._naked_single_group(group):
+                        self.stats["naked_single"] += 1
+                    if self._hidden_single_group(group):
+                        self.stats["hidden_single"] += 1
+                for name, tactic in self.tactics:
+                    if tactic():
+                        self.stats[name] += 1
+                        break
+                else:
+                    return
 
     def naked_single(self) -> bool:
         """Eliminate candidates and check for sole remaining possibilities.
@@ -258,12 +518,20 @@ class Board(object):
         """
         value = False
         for group in self.groups:
-            popped_value = set()
-            for tile in group:
-                popped_value.add(tile.value)
-            for tile in group:
-                if tile.remove_candidates(popped_value):
-                    value = True
+            if self._naked_single_group(group):
+                value = True
+        return value
+
+    def _naked_single_group(self, group: List[Tile]) -> bool:
+        """Naked single within one group"""
+        value = False
+        popped_value = set()
+        for tile in group:
+            popped_value.add(tile.value)
+        for tile in group:
+            # Known tiles keep their own value as sole candidate
+            if tile.value == UNKNOWN and tile.remove_candidates(popped_value):
+                value = True
         return value
 
     def hidden_single(self):
@@ -274,34 +542,156 @@ class Board(object):
             no return 
         """
         for group in self.groups:
-            leftovers = set(CHOICES)
+            self._hidden_single_group(group)
 
-            for tile in group:
-                if tile.value in CHOICES:
-                    leftovers.discard(tile.value)
+    def _hidden_single_group(self, group: List[Tile]) -> bool:
+        """Hidden single within one group.
+        Returns True if we set the value of a tile.
+        """
+        progress = False
+        leftovers = set(CHOICES)
 
-            for value in leftovers:
-                count = 0
+        for tile in group:
+            if tile.value in CHOICES:
+                leftovers.discard(tile.value)
+
+        for value in leftovers:
+            count = 0
+            for tile in group:
+                if tile.value is UNKNOWN:
+                    if value in tile.candidates:
+                        count += 1
+            if count == 1:
                 for tile in group:
-                    if tile.value is UNKNOWN:
-                        if value in tile.candidates:
-                            count += 1
-                if count == 1:
-                    for tile in group:
-                        if tile.value is UNKNOWN and value in tile.candidates:
-                            tile.set_value(value)
-
-    def min_choice_tile(self) -> Tile:
-        """Returns a tile with value UNKNOWN and
-        minimum number of candidates.
-        Precondition: There is at least one tile
-        with value UNKNOWN.
+                    if tile.value is UNKNOWN and value in tile.candidates:
+                        tile.set_value(value)
+                        progress = True
+        return progress
+
+    def naked_subset(self, size: int) -> bool:
+        """Naked pairs (size 2), triples (size 3), ...: if the
+        candidates of 'size' unknown tiles in a group are drawn
+        from just 'size' values, those values must go in those
+        tiles, so no other tile in the group can have them.
+        Return value True means we crossed off at least one candidate.
         """
-
+        progress = False
+        for group in self.groups:
+            unknown = [tile for tile in group if tile.value == UNKNOWN]
+            small = [tile for tile in unknown if len(tile.candidates) <= size]
+            for subset in itertools.combinations(small, size):
+                # Earlier eliminations may have settled some tiles
+                if any(tile.value != UNKNOWN for tile in subset):
+                    continue
+                values = set().union(*(tile.candidates for tile in subset))
+                if len(values) != size:
+                    continue
+                for tile in unknown:
+                    if tile not in subset and tile.remove_candidates(values):
+                        progress = True
+        return progress
+
+    def hidden_subset(self, size: int) -> bool:
+        """Hidden pairs, triples, ...: if 'size' values can only go
+        in the same 'size' tiles of a group, those tiles can't hold
+        anything else.
+        Return value True means we crossed off at least one candidate.
+        """
+        progress = False
         for group in self.groups:
+            places = {value: [] for value in CHOICES}
             for tile in group:
-                if tile.value == UNKNOWN and len(tile.candidates) == 2:
-                    return tile
+                if tile.value == UNKNOWN:
+                    for value in tile.candidates:
+                        places[value].append(tile)
+            for tile in group:
+                places.pop(tile.value, None)
+            few = [value for value in places if 0 < len(places[value]) <= size]
+            for values in itertools.combinations(few, size):
+                tiles = set().union(*(places[value] for value in values))
+                if len(tiles) != size:
+                    continue
+                for tile in tiles:
+                    if tile.value == UNKNOWN and \
+                            tile.remove_candidates(tile.candidates.difference(values)):
+                        progress = True
+        return progress
+
+    def pointing(self) -> bool:
+        """Pointing pairs/triples: if a value's only places in a block
+        lie in one row or column, it can't go elsewhere in that line.
+        """
+        return self._intersection(self.blocks, self.lines)
+
+    def box_line(self) -> bool:
+        """Box/line reduction: if a value's only places in a row or
+        column lie in one block, it can't go elsewhere in that block.
+        """
+        return self._intersection(self.lines, self.blocks)
+
+    def _intersection(self, sources: List[List[Tile]],
+                      targets: List[List[Tile]]) -> bool:
+        """Shared logic of pointing and box_line: when all the places
+        for a value in a source group also lie in one target group,
+        remove the value from the rest of the target group.
+        """
+        target_ids = {id(group) for group in targets}
+        progress = False
+        for group in sources:
+            for value in CHOICES:
+                places = []
+                for tile in group:
+                    if tile.value == value:
+                        # Already placed, perhaps by an earlier elimination
+                        places = []
+                        break
+                    if tile.value == UNKNOWN and value in tile.candidates:
+                        places.append(tile)
+                if not places:
+                    continue
+                shared = set(places[0].group_ids)
+                for tile in places[1:]:
+                    shared.intersection_update(tile.group_ids)
+                for group_id in shared:
+                    target = self.groups[group_id]
+                    if id(target) not in target_ids:
+                        continue
+                    for tile in target:
+                        if tile.value == UNKNOWN and tile not in places \
+                                and tile.remove_candidates({value}):
+                            progress = True
+        return progress
+
+    def min_choice_tile(self) -> Optional[Tile]:
+        """Returns a tile with value UNKNOWN and
+        minimum number of candidates (possibly zero, if
+        the board is inconsistent), or None if there is
+        no tile with value UNKNOWN.  With degree_tiebreak,
+        prefer the tile with the most unknown peers.
+        """
+        fewest = self.index.fewest()
+        if not fewest:
+            return None
+        if not self.degree_tiebreak:
+            return fewest[0]
+        return max(fewest, key=lambda tile: sum(
+            1 for peer in self.peers(tile) if peer.value == UNKNOWN))
+
+    def peers(self, tile: Tile) -> List[Tile]:
+        """The other tiles sharing a group with tile"""
+        return [self.cells[cell] for cell in self.layout.peers[tile.cell]]
+
+    def ordered_candidates(self, tile: Tile) -> List[str]:
+        """Candidates of tile in the order solve should try them:
+        with lcv, those that appear among the fewest unknown peers'
+        candidates first.
+        """
+        if not self.lcv:
+            return sorted(tile.candidates)
+        unknown_peers = [peer for peer in self.peers(tile)
+                         if peer.value == UNKNOWN]
+        return sorted(tile.candidates, key=lambda value: (
+            sum(1 for peer in unknown_peers if value in peer.candidates), value))
 
     def __str__(self) -> str:
         """In Sadman Sudoku format"""
@@ -320,10 +710,8 @@ class Board(object):
     def is_complete(self) -> bool:
         """Checks if the board is complete.
         Returns True if complete and False otherwise."""
-        for group in self.groups:
-            for tile in group:
-                if tile.value == UNKNOWN:
-                    return False
-        if self.is_consistent:
-            return True
+        for tile in self.cells:
+            if tile.value == UNKNOWN:
+                return False
+        return self.is_consistent()
     
@@ -0,0 +1,193 @@
+"""
+Canonical puzzle forms and a solution cache keyed by them.
+
+Two puzzles are the same for our purposes if one can be turned into
+the other by relabeling the symbols, permuting rows within each band
+or columns within each stack, and transposing.  canonical() picks
+one representative of each such family, the lexicographically
+smallest after relabeling symbols in order of first appearance, and
+returns the transformation that produces it, so a solution stored
+for the canonical form can be mapped back onto any member.
+
+Columns within stacks are enumerated outright, which is cheap for
+9x9 (216 orders) but not for larger boards, so for ROOT > 3 only
+row permutations, transposition and relabeling are considered.
+"""
+
+from sdk_config import CHOICES, UNKNOWN, ROOT, NROWS, NCOLS
+
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+import collections
+import itertools
+import shelve
+
+import logging
+logging.basicConfig()
+log = logging.getLogger(__name__)
+log.setLevel(logging.INFO)
+
+
+class Transform(NamedTuple):
+    """out[r][c] = relabel[src[rows[r]][cols[c]]], where src is the
+    original grid, transposed first if transpose is set.
+    """
+    transpose: bool
+    rows: Tuple[int, ...]
+    cols: Tuple[int, ...]
+    relabel: Dict[str, str]
+
+
+def _column_orders() -> List[Tuple[int, ...]]:
+    """Every order of columns that keeps each stack in place"""
+    if ROOT > 3:
+        return [tuple(range(NCOLS))]
+    stacks = [itertools.permutations(range(s * ROOT, (s + 1) * ROOT))
+              for s in range(ROOT)]
+    return [sum(choice, ()) for choice in itertools.product(*stacks)]
+
+
+_COL_ORDERS = _column_orders()
+
+
+def _transposed(rows: Sequence[str]) -> List[str]:
+    return ["".join(row[col] for row in rows) for col in range(NCOLS)]
+
+
+def _state_key(perm_rows: List[str], chosen: Tuple[int, ...],
+               labels: Dict[str, str], band: int) -> tuple:
+    """What determines the rest of the output of a search state:
+    the rows not yet chosen (in column order), by band, and the
+    labels given so far.  States with equal keys finish identically,
+    so only one of them needs to be kept.
+    """
+    remaining = tuple(tuple(sorted(perm_rows[row] for row in range(b * ROOT, (b + 1) * ROOT)
+                                   if row not in chosen))
+                      for b in range(band, ROOT))
+    return remaining, tuple(sorted(labels.items()))
+
+
+def canonical(rows: Sequence[str]) -> Tuple[List[str], Transform]:
+    """The canonical form of a puzzle (rows as from Board.as_list)
+    and the transformation that maps the puzzle onto it.
+    """
+    # Search states: (rows of the source grid with columns reordered,
+    # transpose, column order, rows chosen so far, symbol relabeling so
+    # far).  Output rows are chosen one at a time, from the rows of the
+    # current band not yet used; at each step only the states giving
+    # the smallest output row survive, and of those only one per
+    # _state_key, which keeps sparse grids (where most orders tie)
+    # from multiplying the states.
+    states = {}
+    for transpose in (False, True):
+        grid = _transposed(rows) if transpose else list(rows)
+        for cols in _COL_ORDERS:
+            perm_rows = ["".join(row[col] for col in cols) for row in grid]
+            states.setdefault(_state_key(perm_rows, (), {}, 0),
+                              (perm_rows, transpose, cols, (), {}))
+    for out_row in range(NROWS):
+        band = out_row // ROOT
+        best = None
+        survivors = {}
+        for perm_rows, transpose, cols, chosen, relabel in states.values():
+            for src_row in range(band * ROOT, (band + 1) * ROOT):
+                if src_row in chosen:
+                    continue
+                labels = dict(relabel)
+                line = []
+                for sym in perm_rows[src_row]:
+                    if sym != UNKNOWN and sym not in labels:
+                        labels[sym] = CHOICES[len(labels)]
+                    line.append(labels.get(sym, UNKNOWN))
+                line = "".join(line)
+                if best is None or line < best:
+                    best = line
+                    survivors = {}
+                if line == best:
+                    now_chosen = chosen + (src_row,)
+                    next_band = (out_row + 1) // ROOT
+                    key = _state_key(perm_rows, now_chosen, labels, next_band)
+                    survivors.setdefault(key, (perm_rows, transpose, cols, now_chosen, labels))
+        states = survivors
+    perm_rows, transpose, cols, chosen, relabel = next(iter(states.values()))
+    # Symbols absent from the puzzle take the remaining labels in order
+    unused = iter(label for label in CHOICES if label not in relabel.values())
+    for sym in CHOICES:
+        if sym not in relabel:
+            relabel[sym] = next(unused)
+    transform = Transform(transpose, chosen, cols, relabel)
+    return apply(transform, rows), transform
+
+
+def apply(transform: Transform, rows: Sequence[str]) -> List[str]:
+    """Transform a grid (puzzle or solution)"""
+    grid = _transposed(rows) if transform.transpose else rows
+    relabel = transform.relabel
+    return ["".join(relabel.get(grid[src_row][col], UNKNOWN) for col in transform.cols)
+            for src_row in transform.rows]
+
+
+def invert(transform: Transform, rows: Sequence[str]) -> List[str]:
+    """Undo transform: map a grid in canonical orientation back
+    to the original one.
+    """
+    unlabel = {label: sym for sym, label in transform.relabel.items()}
+    grid = [[UNKNOWN] * NCOLS for _ in range(NROWS)]
+    for out_row, src_row in enumerate(transform.rows):
+        for out_col, src_col in enumerate(transform.cols):
+            grid[src_row][src_col] = unlabel.get(rows[out_row][out_col], UNKNOWN)
+    grid = ["".join(row) for row in grid]
+    return _transposed(grid) if transform.transpose else grid
+
+
+class SolutionCache(object):
+    """Solutions keyed by canonical puzzle form, in an in-memory LRU
+    of the given capacity, backed by a shelve file if path is given.
+    """
+
+    def __init__(self, capacity: int = 10000, path: Optional[str] = None):
+        self.capacity = capacity
+        self.recent = collections.OrderedDict()
+        self.disk = shelve.open(path) if path else None
+        self.hits = self.misses = 0
+
+    def _lookup(self, key: str) -> Optional[List[str]]:
+        if key in self.recent:
+            self.recent.move_to_end(key)
+            return self.recent[key]
+        if self.disk is not None and key in self.disk:
+            solution = self.disk[key]
+            self._remember(key, solution)
+            return solution
+        return None
+
+    def _remember(self, key: str, solution: List[str]):
+        self.recent[key] = solution
+        self.recent.move_to_end(key)
+        if len(self.recent) > self.capacity:
+            self.recent.popitem(last=False)
+
+    def get(self, puzzle: Sequence[str]) -> Optional[List[str]]:
+        """Solution of puzzle (as from Board.as_list) in its own
+        orientation, if cached
+        """
+        form, transform = canonical(puzzle)
+        solution = self._lookup("".join(form))
+        if solution is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return invert(transform, solution)
+
+    def put(self, puzzle: Sequence[str], solution: Sequence[str]):
+        """Remember the solution of puzzle (both as from Board.as_list)"""
+        form, transform = canonical(puzzle)
+        key = "".join(form)
+        canonical_solution = apply(transform, solution)
+        self._remember(key, canonical_solution)
+        if self.disk is not None:
+            self.disk[key] = canonical_solution
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
+            self.disk = None
@@ -39,4 +39,4 @@ COLOR_KNOWN = "#ccffcc"       # Green
 COLOR_UNKNOWN = "#ffffcc"     # Beige
 COLOR_WORKING = "#ffccff"     # Pink
 
-UPDATE_DELAY = 0.05           # delay between individual tile updates, in seconds
\ No newline at end of file
+FRAME_DELAY = 1 / 30          # minimum time between redraws, in seconds
\ No newline at end of file
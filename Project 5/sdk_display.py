@@ -5,7 +5,11 @@ Designed for a simple model/view/controller architecture,
 in which the sdk_board display knows about the sudoku sdk_board, 
 and not vice versa.  Communication from the sudoku sdk_board
 to the sdk_board display is by event notifications through 
-registered observers. 
+registered observers.  Tile views do not draw as soon as they are
+notified; they mark themselves dirty, and once FRAME_DELAY has passed
+since the last frame the board redraws every dirty tile and lets the
+window process its events.  Drawing stays on the solver's thread (Tk
+is not thread-safe), and intermediate states are dropped.
 Displays a rectangular grid of cells, organized in rows and columns
 with row 0 at the top and growing down, column 0 at the left and 
 growing to the right.  A sequence of unique colors for cells can 
@@ -23,36 +27,77 @@ import time
 # Peer classes from model
 import sdk_board
 from sdk_board import EventKind
+from typing import Callable
 
 # Graphics package based on Zelle's simple OO graphics
 import graphics.grid
 import graphics.graphics
 
-from sdk_config import NROWS, NCOLS, ROOT, UNKNOWN, COLOR_UNKNOWN, COLOR_KNOWN, PENCIL, UPDATE_DELAY
+from sdk_config import NROWS, NCOLS, ROOT, UNKNOWN, COLOR_UNKNOWN, COLOR_KNOWN, PENCIL, FRAME_DELAY
 
 import logging
 logging.basicConfig(level = logging.DEBUG)
 log = logging.getLogger(__file__)
 
 
+def window_update(grid) -> Callable[[], None]:
+    """The update() of the grid or its window, which shows what has
+    been drawn and handles pending window events (a no-op if neither
+    has one)
+    """
+    for window in (grid, getattr(grid, "win", None)):
+        update = getattr(window, "update", None)
+        if callable(update):
+            return update
+    return lambda: None
+
+
 class Board(object):
     """View of sdk_board.Board"""
 
-    def __init__(self, model: sdk_board.Board, width: int, height: int):
+    def __init__(self, model: sdk_board.Board, width: int, height: int,
+                 grid=None, clock: Callable[[], float] = time.monotonic):
         """Create a view of the sdk_board.
-        Width and height are dimensions in pixels.
+        Width and height are dimensions in pixels.  grid (a
+        graphics.grid.Grid by default) and clock can be replaced,
+        e.g. in tests.
         """
         self.model = model
-        self.grid = graphics.grid.Grid(width, height, NROWS, NCOLS, title="Duck Sudoku")
+        if grid is None:
+            grid = graphics.grid.Grid(width, height, NROWS, NCOLS, title="Duck Sudoku")
+        self.grid = grid
         
         # We don't actually observe the model sdk_board; each individual tile view
-        # observes its own model tile
+        # observes its own model tile, and reports to us when it needs redrawing
+        self.dirty = { }      # Tile views awaiting redraw, in order
+        self.clock = clock
+        self.update_window = window_update(self.grid)
         self.tiles = [ ]
         for row in model.tiles:
             for tile in row:
-                self.tiles.append(Tile(self.grid, tile))
+                self.tiles.append(Tile(self.grid, tile, board=self))
+        self.last_frame = self.clock()
+
+    def mark_dirty(self, tile: "Tile"):
+        """A tile view needs redrawing; redraw everything that
+        does if a frame is due.
+        """
+        self.dirty[tile] = True
+        if self.clock() - self.last_frame >= FRAME_DELAY:
+            self.render()
+
+    def render(self):
+        """Redraw every dirty tile with its current model state,
+        and show the frame"""
+        dirty, self.dirty = self.dirty, { }
+        for tile in dirty:
+            tile.draw()
+        self.update_window()
+        self.last_frame = self.clock()
 
     def close(self):
+        """Show the final state, then close the window"""
+        self.render()
         self.grid.close()
 
 
@@ -60,26 +105,35 @@ class Tile(sdk_board.TileObserver):
     """View of a single tile"""
 
     def __init__(self, grid: graphics.grid.Grid, model: sdk_board.Tile,
-                     scan=False):
-        """Create a view of a single tile"""
+                     scan=False, board: Board = None):
+        """Create a view of a single tile.  If board is given,
+        redrawing is left to the board's frames; otherwise
+        the tile is redrawn on every change.
+        """
         self.grid = grid
         self.model = model
         self.row = model.row
         self.col = model.col
         self.scan = scan
+        self.board = board
         self.grid.sub_grid_dim(ROOT,ROOT)
-        self._update(sdk_board.TileEvent(self.model, EventKind.TileChanged))
+        self.draw()
         self.model.add_observer(self)
 
     def _update(self, event: sdk_board.TileEvent):
         """Update the view of the tile when the model changes"""
-        # Color code the tiles to indicate groups and status
-        if event.kind == EventKind.TileChanged:
-            self._color_by_status()
-            self._label()
-        else:
+        if event.kind != EventKind.TileChanged:
             raise ValueError("Unanticipated event type")
-        time.sleep(UPDATE_DELAY)
+        if self.board is None:
+            self.draw()
+        else:
+            self.board.mark_dirty(self)
+
+    def draw(self):
+        """Draw the current state of the model tile"""
+        # Color code the tiles to indicate groups and status
+        self._color_by_status()
+        self._label()
 
     def _color_by_status(self):
         """Color the tile according to its status"""
@@ -0,0 +1,224 @@
+"""
+Dancing Links solver.  Sudoku is an exact cover problem: choose one
+(row, column, symbol) placement for each of four kinds of constraint,
+namely every cell holds a symbol, and every row, column and block
+holds each symbol exactly once.  Knuth's Algorithm X on a toroidal
+doubly linked matrix (Dancing Links) searches that problem with
+cheap, exactly reversible cover/uncover steps.
+
+Unlike the guess-and-check in sdk_board.Board.solve, the search
+can continue past the first solution, so it also counts solutions.
+"""
+
+from sdk_config import CHOICES, UNKNOWN, ROOT, NROWS, NCOLS
+import sdk_board
+from typing import List, Iterator, Optional, Sequence, Tuple
+
+import logging
+logging.basicConfig()
+log = logging.getLogger(__name__)
+log.setLevel(logging.INFO)
+
+NSYMS = len(CHOICES)
+
+
+class _Node(object):
+    """One 1 in the exact cover matrix"""
+    __slots__ = ("left", "right", "up", "down", "column", "placement")
+
+    def __init__(self, column: Optional["_Column"] = None,
+                 placement: Optional[Tuple[int, int, int]] = None):
+        self.left = self.right = self.up = self.down = self
+        self.column = column
+        self.placement = placement
+
+
+class _Column(_Node):
+    """Header of one constraint column"""
+    __slots__ = ("size",)
+
+    def __init__(self):
+        super().__init__()
+        self.column = self
+        self.size = 0
+
+
+def _cover(column: _Column):
+    column.right.left = column.left
+    column.left.right = column.right
+    row = column.down
+    while row is not column:
+        node = row.right
+        while node is not row:
+            node.down.up = node.up
+            node.up.down = node.down
+            node.column.size -= 1
+            node = node.right
+        row = row.down
+
+
+def _uncover(column: _Column):
+    row = column.up
+    while row is not column:
+        node = row.left
+        while node is not row:
+            node.column.size += 1
+            node.down.up = node
+            node.up.down = node
+            node = node.left
+        row = row.up
+    column.right.left = column
+    column.left.right = column
+
+
+class DLX(object):
+    """Exact cover matrix for a Sudoku grid, with the givens
+    already chosen.
+    """
+
+    def __init__(self, tile_values: Sequence[Sequence[str]]):
+        """tile_values as produced by sdk_board.Board.as_list.
+        Raises ValueError if the givens conflict.
+        """
+        self.root = _Column()
+        ncells = NROWS * NCOLS
+        columns = [_Column() for _ in range(4 * ncells)]
+        for column in columns:
+            column.left = self.root.left
+            column.right = self.root
+            self.root.left.right = column
+            self.root.left = column
+
+        # Placement (row, col, sym) satisfies one constraint of each kind
+        self.rows = {}
+        for row in range(NROWS):
+            for col in range(NCOLS):
+                block = (row // ROOT) * ROOT + col // ROOT
+                for sym in range(NSYMS):
+                    placement = (row, col, sym)
+                    first = None
+                    for col_id in (row * NCOLS + col,
+                                   ncells + row * NSYMS + sym,
+                                   2 * ncells + col * NSYMS + sym,
+                                   3 * ncells + block * NSYMS + sym):
+                        header = columns[col_id]
+                        node = _Node(header, placement)
+                        node.up = header.up
+                        node.down = header
+                        header.up.down = node
+                        header.up = node
+                        header.size += 1
+                        if first is None:
+                            first = node
+                        else:
+                            node.left = first.left
+                            node.right = first
+                            first.left.right = node
+                            first.left = node
+                    self.rows[placement] = first
+
+        self.givens: List[Tuple[int, int, int]] = []
+        for row in range(NROWS):
+            for col in range(NCOLS):
+                value = tile_values[row][col]
+                if value != UNKNOWN:
+                    self._choose_given((row, col, CHOICES.index(value)))
+
+    def _choose_given(self, placement: Tuple[int, int, int]):
+        """Select the matrix row for a given, covering its columns"""
+        first = self.rows[placement]
+        node = first
+        while True:
+            # A column already covered by another given is a conflict
+            header = node.column
+            if header.left.right is not header:
+                raise ValueError(f"Conflicting given at {placement[:2]}")
+            node = node.right
+            if node is first:
+                break
+        node = first
+        while True:
+            _cover(node.column)
+            node = node.right
+            if node is first:
+                break
+        self.givens.append(placement)
+
+    def solutions(self) -> Iterator[List[Tuple[int, int, int]]]:
+        """Generate the placements of each solution in turn,
+        givens included.
+        """
+        chosen = list(self.givens)
+        yield from self._search(chosen)
+
+    def _search(self, chosen: List[Tuple[int, int, int]]):
+        root = self.root
+        if root.right is root:
+            yield list(chosen)
+            return
+        # Branch on the column with the fewest remaining rows
+        column = root.right
+        best = column
+        while column is not root:
+            if column.size < best.size:
+                best = column
+                if best.size <= 1:
+                    break
+            column = column.right
+        if best.size == 0:
+            return
+        _cover(best)
+        row = best.down
+        while row is not best:
+            chosen.append(row.placement)
+            node = row.right
+            while node is not row:
+                _cover(node.column)
+                node = node.right
+            yield from self._search(chosen)
+            node = row.left
+            while node is not row:
+                _uncover(node.column)
+                node = node.left
+            chosen.pop()
+            row = row.down
+        _uncover(best)
+
+
+def _write_back(board: sdk_board.Board, placements: List[Tuple[int, int, int]]):
+    for row, col, sym in placements:
+        tile = board.tiles[row][col]
+        if tile.value == UNKNOWN:
+            tile.set_value(CHOICES[sym])
+
+
+def solve(board: sdk_board.Board) -> bool:
+    """Solve board by Dancing Links, writing the solution into
+    its tiles.  Returns True if a solution was found.
+    """
+    try:
+        matrix = DLX(board.as_list())
+    except ValueError as e:
+        log.debug(f"Inconsistent board: {e}")
+        return False
+    for placements in matrix.solutions():
+        _write_back(board, placements)
+        return True
+    return False
+
+
+def count_solutions(board: sdk_board.Board, limit: Optional[int] = None) -> int:
+    """Number of solutions of board, stopping once limit is reached
+    (limit=2 is enough to tell whether the solution is unique).
+    The board itself is not changed.
+    """
+    try:
+        matrix = DLX(board.as_list())
+    except ValueError:
+        return 0
+    count = 0
+    for _ in matrix.solutions():
+        count += 1
+        if limit is not None and count >= limit:
+            break
+    return count
@@ -0,0 +1,148 @@
+"""
+Generating and rating Sudoku puzzles.
+
+A puzzle is generated by filling a random complete grid and then
+removing givens in random order, keeping each removal only if the
+puzzle still has exactly one solution (checked with the bitmask
+engine's solution counter).
+
+A puzzle is rated by solving it with sdk_board.Board and looking
+at Board.stats: which tactics propagation needed, and how many
+guesses and backtracks the search made.
+
+To write 1000 rated puzzles using all cores:
+    python3 sdk_generate.py -n 1000 -o puzzles.txt
+Each output line is the puzzle on one line, its level and its score.
+"""
+
+from sdk_config import CHOICES, UNKNOWN, ROOT, NROWS, NCOLS
+import sdk_board
+import sdk_bitboard
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+import argparse
+import random
+import sys
+
+import logging
+logging.basicConfig()
+log = logging.getLogger(__name__)
+log.setLevel(logging.INFO)
+
+# Difficulty levels, by the hardest technique the solver needed.
+LEVELS = ["easy", "medium", "hard", "expert"]
+LEVEL_OF_TACTIC = {
+    "naked_single": 0, "hidden_single": 0,
+    "naked_pair": 1, "hidden_pair": 1, "pointing": 1, "box_line": 1,
+    "naked_triple": 2, "hidden_triple": 2,
+}
+# Contribution of each use of a technique to the score
+WEIGHT = {
+    "naked_single": 1, "hidden_single": 2,
+    "naked_pair": 10, "hidden_pair": 15, "pointing": 10, "box_line": 10,
+    "naked_triple": 25, "hidden_triple": 30,
+    "guesses": 50, "backtracks": 100,
+}
+
+
+class Rating(NamedTuple):
+    level: str
+    score: int
+    stats: dict
+
+
+def solved_grid(rng: random.Random) -> List[str]:
+    """A random complete grid.  The blocks on the diagonal don't
+    constrain one another, so we fill them with random permutations
+    and let the solver complete the rest.
+    """
+    rows = [[UNKNOWN] * NCOLS for _ in range(NROWS)]
+    for block in range(ROOT):
+        symbols = rng.sample(CHOICES, len(CHOICES))
+        for i, sym in enumerate(symbols):
+            rows[block * ROOT + i // ROOT][block * ROOT + i % ROOT] = sym
+    grid = sdk_bitboard.BitBoard.from_list(rows)
+    grid.solve()
+    return grid.as_list()
+
+
+def generate(rng: random.Random, min_givens: int = 0) -> List[str]:
+    """A random puzzle with a unique solution, as rows for
+    Board.set_tiles.  Givens are removed until no more can go
+    without losing uniqueness, or min_givens remain.
+    """
+    rows = [list(row) for row in solved_grid(rng)]
+    givens = NROWS * NCOLS
+    cells = [(row, col) for row in range(NROWS) for col in range(NCOLS)]
+    rng.shuffle(cells)
+    for row, col in cells:
+        if givens <= min_givens:
+            break
+        kept = rows[row][col]
+        rows[row][col] = UNKNOWN
+        if sdk_bitboard.BitBoard.from_list(rows).count_solutions(limit=2) == 1:
+            givens -= 1
+        else:
+            rows[row][col] = kept
+    return ["".join(row) for row in rows]
+
+
+def rate(rows: List[str]) -> Rating:
+    """Rate a puzzle by what sdk_board.Board needed to solve it"""
+    board = sdk_board.Board()
+    board.set_tiles(rows)
+    board.solve()
+    stats = dict(board.stats)
+    score = sum(WEIGHT.get(name, 0) * count for name, count in stats.items())
+    if stats.get("guesses"):
+        level = len(LEVELS) - 1
+    else:
+        level = max((LEVEL_OF_TACTIC[name] for name in stats
+                     if name in LEVEL_OF_TACTIC), default=0)
+    return Rating(LEVELS[level], score, stats)
+
+
+def _generate_rated(seed: int, min_givens: int) -> Tuple[List[str], Rating]:
+    rows = generate(random.Random(seed), min_givens)
+    return rows, rate(rows)
+
+
+def generate_many(count: int, seed: Optional[int] = None, min_givens: int = 0,
+                  workers: Optional[int] = None) -> Iterator[Tuple[List[str], Rating]]:
+    """Generate and rate count puzzles in a pool of worker processes.
+    Each puzzle has its own seed drawn from seed, so a run can be
+    repeated exactly.
+    """
+    seeds = random.Random(seed)
+    jobs = [seeds.getrandbits(64) for _ in range(count)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_generate_rated, jobs, [min_givens] * count,
+                            chunksize=max(1, count // 64))
+
+
+def cli() -> object:
+    """Get arguments from the command line"""
+    parser = argparse.ArgumentParser(description="Sudoku puzzle generator")
+    parser.add_argument("-n", "--count", type=int, default=10,
+                        help="Number of puzzles to generate")
+    parser.add_argument("-s", "--seed", type=int, default=None,
+                        help="Random seed, to repeat a run")
+    parser.add_argument("-g", "--min-givens", type=int, default=0,
+                        help="Stop removing givens at this many")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Worker processes (default: one per CPU)")
+    parser.add_argument("-o", "--output", type=argparse.FileType("w"),
+                        default=sys.stdout)
+    return parser.parse_args()
+
+
+def main():
+    args = cli()
+    for rows, rating in generate_many(args.count, args.seed,
+                                      args.min_givens, args.jobs):
+        print(f"{''.join(rows)}\t{rating.level}\t{rating.score}", file=args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Board geometry as flat integer tables.  Cells are numbered
+0 .. N*N-1 row by row (cell = row * N + col, with N = ROOT * ROOT).
+For each ROOT we compute once, and cache, the groups (rows, then
+columns, then blocks) as tuples of cells, the groups each cell
+belongs to, and each cell's peers, so that solvers can work with
+integer indices instead of walking an object graph.
+"""
+
+from typing import Tuple
+import functools
+
+
+class Layout(object):
+    """Cell, group and peer tables for one board size"""
+
+    def __init__(self, root: int):
+        self.root = root
+        self.size = size = root * root
+        self.ncells = ncells = size * size
+        self.row_of = tuple(cell // size for cell in range(ncells))
+        self.col_of = tuple(cell % size for cell in range(ncells))
+        self.block_of = tuple((self.row_of[cell] // root) * root
+                              + self.col_of[cell] // root
+                              for cell in range(ncells))
+        rows = [tuple(row * size + col for col in range(size))
+                for row in range(size)]
+        cols = [tuple(row * size + col for row in range(size))
+                for col in range(size)]
+        blocks = [tuple(cell for cell in range(ncells)
+                        if self.block_of[cell] == block)
+                  for block in range(size)]
+        self.groups: Tuple[Tuple[int, ...], ...] = tuple(rows + cols + blocks)
+        # Group ids of each cell: its row, column and block
+        self.cell_groups: Tuple[Tuple[int, int, int], ...] = tuple(
+            (self.row_of[cell], size + self.col_of[cell], 2 * size + self.block_of[cell])
+            for cell in range(ncells))
+        self.peers: Tuple[Tuple[int, ...], ...] = tuple(
+            tuple(sorted(set().union(*(self.groups[g] for g in self.cell_groups[cell]))
+                         - {cell}))
+            for cell in range(ncells))
+
+
+@functools.lru_cache(maxsize=None)
+def layout(root: int) -> Layout:
+    """The (shared, read-only) layout for boards of the given ROOT"""
+    return Layout(root)
+
+
+def symbols(root: int) -> str:
+    """A conventional set of symbols for boards of the given ROOT:
+    digits 1-9 for 9x9, hexadecimal digits for 16x16, and letters
+    for larger boards.
+    """
+    size = root * root
+    if size <= 9:
+        return "123456789"[:size]
+    if size <= 16:
+        return "0123456789ABCDEF"[:size]
+    return "ABCDEFGHIJKLMNOPQRSTUVWXYZ"[:size]
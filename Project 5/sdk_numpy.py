@@ -0,0 +1,110 @@
+"""
+NumPy view of Sudoku boards, for checking many boards at once.
+
+A board is an N x N integer array holding 0 for an unknown tile and
+i + 1 for the symbol CHOICES[i].  A stack of boards is a K x N x N
+array.  Consistency, completeness and candidate counts are computed
+with whole-array reductions over rows, columns and blocks, so that
+validating a stack of thousands of boards is a handful of NumPy
+operations rather than a Python loop per tile.
+
+Requires NumPy, which the rest of the solver does not.
+"""
+
+from sdk_config import CHOICES, UNKNOWN, ROOT, NROWS
+import sdk_board
+import sdk_reader
+
+from typing import Iterable, List, Sequence, Tuple, Union
+import itertools
+import numpy as np
+
+# Byte value of a symbol -> its number on the board (0 for unknown)
+_CODE = np.zeros(256, dtype=np.uint8)
+for _i, _sym in enumerate(CHOICES):
+    _CODE[ord(_sym)] = _i + 1
+_SYMBOL = np.frombuffer((UNKNOWN + CHOICES).encode("ascii"), dtype=np.uint8)
+
+
+def to_array(board: Union[sdk_board.Board, Sequence[str]]) -> np.ndarray:
+    """The values of a Board, or of rows as from Board.as_list"""
+    rows = board.as_list() if isinstance(board, sdk_board.Board) else board
+    return stack(["".join(rows)])[0]
+
+
+def stack(puzzles: Iterable[str]) -> np.ndarray:
+    """A K x N x N stack from puzzles in one-line form
+    (NROWS * NCOLS symbols each)
+    """
+    text = "".join(puzzles).encode("ascii")
+    return _CODE[np.frombuffer(text, dtype=np.uint8)].reshape(-1, NROWS, NROWS)
+
+
+def load(path: str, limit: int = None) -> np.ndarray:
+    """A stack of every puzzle (up to limit) in a file that
+    sdk_reader.iter_puzzles can read
+    """
+    puzzles = itertools.islice(sdk_reader.iter_puzzles(path), limit)
+    return stack("".join(rows) for rows in puzzles)
+
+
+def as_list(grid: np.ndarray) -> List[str]:
+    """Rows of a single board, compatible with Board.set_tiles"""
+    return [row.tobytes().decode("ascii") for row in _SYMBOL[grid]]
+
+
+def _blocks(grids: np.ndarray) -> np.ndarray:
+    """Regroup the last two axes so each row of the result is a block"""
+    lead = grids.shape[:-2]
+    blocks = grids.reshape(lead + (ROOT, ROOT, ROOT, ROOT))
+    blocks = np.swapaxes(blocks, -3, -2)
+    return blocks.reshape(lead + (NROWS, NROWS))
+
+
+def symbol_counts(grids: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """How often each symbol appears in each row, column and block:
+    three arrays of shape (..., N groups, N symbols).
+    """
+    symbols = np.arange(1, NROWS + 1, dtype=grids.dtype)
+    rows = (grids[..., None] == symbols).sum(axis=-2, dtype=np.int16)
+    cols = (grids[..., :, :, None] == symbols).sum(axis=-3, dtype=np.int16)
+    blocks = (_blocks(grids)[..., None] == symbols).sum(axis=-2, dtype=np.int16)
+    return rows, cols, blocks
+
+
+def is_consistent(grids: np.ndarray) -> Union[bool, np.ndarray]:
+    """No symbol repeats in any row, column or block.  For a stack,
+    an array with one result per board.
+    """
+    axes = (-2, -1)
+    result = np.logical_and.reduce([(counts <= 1).all(axis=axes)
+                                    for counts in symbol_counts(grids)])
+    return bool(result) if result.ndim == 0 else result
+
+
+def is_complete(grids: np.ndarray) -> Union[bool, np.ndarray]:
+    """Every tile is known and the board is consistent"""
+    result = (grids != 0).all(axis=(-2, -1)) & is_consistent(grids)
+    return bool(result) if np.ndim(result) == 0 else result
+
+
+def candidate_counts(grids: np.ndarray) -> np.ndarray:
+    """Number of symbols each unknown tile could still hold given its
+    row, column and block (1 for known tiles), shaped like grids.
+    """
+    rows, cols, blocks = (counts > 0 for counts in symbol_counts(grids))
+    lead = grids.shape[:-2]
+    # Spread the block usage back out to the tiles of each block
+    block_used = blocks.reshape(lead + (ROOT, 1, ROOT, 1, NROWS))
+    block_used = np.broadcast_to(block_used, lead + (ROOT, ROOT, ROOT, ROOT, NROWS))
+    block_used = block_used.reshape(lead + (NROWS, NROWS, NROWS))
+    used = rows[..., :, None, :] | cols[..., None, :, :] | block_used
+    counts = NROWS - used.sum(axis=-1)
+    return np.where(grids == 0, counts, 1)
+
+
+def validate_many(grids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(consistent, complete) flags for each board of a stack"""
+    consistent = np.atleast_1d(is_consistent(grids))
+    complete = consistent & (grids != 0).all(axis=(-2, -1))
+    return consistent, complete
@@ -0,0 +1,97 @@
+"""
+Solving one hard puzzle on several cores.  The search tree is
+split at its first few branching points (the tiles chosen by
+Board.min_choice_tile, after propagation) into independent
+subproblems, which worker processes solve concurrently.  As soon as
+one worker finds a solution the others are told to stop, and
+subproblems not yet started are cancelled.
+"""
+
+from sdk_config import UNKNOWN
+import sdk_board
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional, Tuple
+import multiprocessing
+
+import logging
+logging.basicConfig()
+log = logging.getLogger(__name__)
+log.setLevel(logging.INFO)
+
+# Set in each worker process: tells it to abandon its search
+_stop = None
+
+
+def split(tile_values: List[str], depth: int) -> Tuple[Optional[List[str]], List[List[str]]]:
+    """Branch on the first depth choices of the search.
+    Returns (solution, []) if the puzzle is solved while splitting,
+    else (None, subproblems), dead ends excluded.  Each subproblem is
+    in Board.as_list form.
+    """
+    board = sdk_board.Board()
+    board.set_tiles(tile_values)
+    parts = []
+
+    def expand(level: int) -> Optional[List[str]]:
+        board.propagate()
+        if not board.is_consistent():
+            return None
+        tile = board.min_choice_tile()
+        if tile is None:
+            return board.as_list()
+        if level == depth:
+            parts.append(board.as_list())
+            return None
+        mark = len(board.trail)
+        for value in board.ordered_candidates(tile):
+            tile.set_value(value)
+            solution = expand(level + 1)
+            if solution is not None:
+                return solution
+            board.undo(mark)
+        return None
+
+    solution = expand(0)
+    return (solution, []) if solution is not None else (None, parts)
+
+
+def _init_worker(stop):
+    global _stop
+    _stop = stop
+
+
+def _solve_part(tile_values: List[str]) -> Optional[List[str]]:
+    """Solve one subproblem (in a worker process)"""
+    board = sdk_board.Board()
+    board.set_tiles(tile_values)
+    board.should_stop = _stop.is_set
+    return board.as_list() if board.solve() else None
+
+
+def solve(board: sdk_board.Board, workers: Optional[int] = None,
+          depth: int = 2) -> bool:
+    """Solve board by searching subtrees in parallel, writing the
+    solution into its tiles.  Returns True if a solution was found.
+    """
+    solution, parts = split(board.as_list(), depth)
+    if solution is None and parts:
+        log.debug(f"Searching {len(parts)} subtrees")
+        stop = multiprocessing.Event()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(stop,)) as pool:
+            futures = [pool.submit(_solve_part, part) for part in parts]
+            for future in as_completed(futures):
+                solution = future.result()
+                if solution is not None:
+                    stop.set()
+                    for pending in futures:
+                        pending.cancel()
+                    break
+    if solution is None:
+        return False
+    for row, tiles in enumerate(board.tiles):
+        for col, tile in enumerate(tiles):
+            if tile.value == UNKNOWN:
+                tile.set_value(solution[row][col])
+    return True
@@ -3,14 +3,20 @@ Reading and writing Sudoku boards.  We use the minimal
 subset of the SadMan Sudoku ".sdk" format,
 see http://www.sadmansoftware.com/sudoku/faq19.php
 
+Large collections of puzzles are streamed with iter_puzzles or
+iter_boards, which accept either the compact format (one puzzle per
+line, NROWS * NCOLS symbols) or SadMan blocks separated by blank
+lines, optionally gzip-compressed; write is the matching bulk writer.
+
 Author: M Young, January 2018
 Modified: B Norris, Feb 5, 2022
 """
 
 import sdk_board
-from sdk_config import NROWS
-from typing import List, Union
+from sdk_config import NROWS, NCOLS
+from typing import List, Union, Iterable, Iterator, Sequence
 from io import IOBase
+import gzip
 
 import logging
 logging.basicConfig()
@@ -33,18 +39,18 @@ def read(the_file: Union[IOBase, str],
         log.debug("Reading from string")
         the_file = open(the_file, "r")
     else:
-        log.debug(f"Reading from file {the_file}")
+        log.debug("Reading from file %s", the_file)
     if the_board is None:
         the_board = sdk_board.Board()
     values = []
     for row in the_file:
         row = row.strip()
-        log.debug(f"Reading row |{row}|")
+        log.debug("Reading row |%s|", row)
         values.append(row)
         if len(row) != NROWS:
             raise InputError("Puzzle row wrong length: {}"
                              .format(row))
-    log.debug(f"Read values: {values}")
+    log.debug("Read values: %s", values)
     if len(values) != NROWS:
         raise InputError("Wrong number of rows in {}"
                          .format(values))
@@ -53,4 +59,79 @@ def read(the_file: Union[IOBase, str],
     return the_board
 
 
+def _open(path: str, mode: str):
+    """Open a text file, decompressing (or compressing) if it
+    is gzipped.
+    """
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t")
+    if "r" in mode:
+        with open(path, "rb") as probe:
+            if probe.read(2) == b"\x1f\x8b":
+                return gzip.open(path, mode + "t")
+    return open(path, mode)
+
+
+def iter_puzzles(the_file: Union[IOBase, str]) -> Iterator[List[str]]:
+    """Generate the rows of each puzzle in a multi-puzzle file,
+    in a format compatible with Board.set_tiles.  Pass in a path
+    (gzipped if it ends in .gz or starts with the gzip magic number)
+    or an already opened text file.  Lines starting with '#' are
+    comments.  Only one puzzle is held in memory at a time.
+    """
+    if isinstance(the_file, str):
+        with _open(the_file, "r") as opened:
+            yield from iter_puzzles(opened)
+        return
+    block = []
+    for line_num, line in enumerate(the_file, start=1):
+        line = line.strip()
+        if line.startswith("#"):
+            continue
+        if len(line) == NROWS * NCOLS and not block:
+            yield [line[row * NCOLS:(row + 1) * NCOLS] for row in range(NROWS)]
+        elif line:
+            if len(line) != NCOLS:
+                raise InputError(f"Line {line_num}: puzzle row wrong length: {line}")
+            block.append(line)
+            if len(block) == NROWS:
+                yield block
+                block = []
+        elif block:
+            raise InputError(f"Line {line_num}: puzzle has only {len(block)} rows")
+    if block:
+        raise InputError(f"Puzzle at end of file has only {len(block)} rows")
+
+
+def iter_boards(the_file: Union[IOBase, str]) -> Iterator[sdk_board.Board]:
+    """Generate a fresh Board for each puzzle in a multi-puzzle file"""
+    for values in iter_puzzles(the_file):
+        the_board = sdk_board.Board()
+        the_board.set_tiles(values)
+        yield the_board
+
+
+def write(boards: Iterable[Union[sdk_board.Board, Sequence[str]]],
+          the_file: Union[IOBase, str], compact: bool = True) -> int:
+    """Write boards (or row lists as from Board.as_list) to a path
+    (gzipped if it ends in .gz) or an already opened text file,
+    one per line if compact, else as SadMan blocks separated by
+    blank lines.  Returns the number of puzzles written.
+    """
+    if isinstance(the_file, str):
+        with _open(the_file, "w") as opened:
+            return write(boards, opened, compact)
+    count = 0
+    for board in boards:
+        rows = board.as_list() if isinstance(board, sdk_board.Board) else board
+        if compact:
+            the_file.write("".join(rows) + "\n")
+        else:
+            if count:
+                the_file.write("\n")
+            the_file.write("\n".join(rows) + "\n")
+        count += 1
+    return count
+
+
 
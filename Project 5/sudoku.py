@@ -12,7 +12,16 @@ In Coding Rooms, you can change the settings and configure your RUN button
 to use a different data file by specifying the above command as a "Custom Command"
 under the "Run Configuration" option.
 
-General usage: python3 sudoku.py [-h] [-d] [sdk_file]
+To solve with Dancing Links (exact cover) instead of guess-and-check:
+    python3 sudoku.py --engine dlx data/evil.sdk
+
+To solve many puzzles in parallel (a directory of .sdk files, a glob
+pattern, or a file with one 81-character puzzle per line):
+    python3 sudoku.py --batch puzzles.txt --jobs 8
+
+General usage: python3 sudoku.py [-h] [-d] [-e {search,bits,dlx}]
+                                 [-u] [-p] [-c CACHE] [-b BATCH] [-j JOBS]
+                                 [sdk_file]
 
 Sudoku solver
 
@@ -22,11 +31,29 @@ positional arguments:
 options:
   -h, --help     show this help message and exit
   -d, --display  Graphical display
+  -e {search,bits,dlx}, --engine {search,bits,dlx}
+                 Solving engine (default: search)
+  -b BATCH, --batch BATCH
+                 Directory, glob, or one-puzzle-per-line file to solve
+  -u, --unique   Reject puzzles without exactly one solution
+  -p, --parallel Split the search for one puzzle across --jobs processes
+                 (search engine only)
+  -c CACHE, --cache CACHE
+                 Solution cache file, keyed by canonical puzzle form
+  -j JOBS, --jobs JOBS
+                 Worker processes for --batch or --parallel
+                 (default: one per CPU)
 """
 
 import argparse
+import sdk_board
 import sdk_reader
 import sdk_display
+import sdk_batch
+import sdk_parallel
+import sdk_canon
+from sdk_batch import ENGINES
+from sdk_config import UNKNOWN
 
 import logging
 logging.basicConfig(level = logging.DEBUG)
@@ -38,28 +65,73 @@ def cli() -> object:
     parser = argparse.ArgumentParser(description="Sudoku solver")
     parser.add_argument("-d", "--display", help="Graphical display",
                         action="store_true")
-    parser.add_argument('sdk_file', nargs='?', type=argparse.FileType('r'),
-                        default='data/easy.sdk')
+    parser.add_argument("-e", "--engine", help="Solving engine (default: search)",
+                        choices=sorted(ENGINES), default="search")
+    parser.add_argument("-b", "--batch",
+                        help="Directory, glob, or one-puzzle-per-line file to solve")
+    parser.add_argument("-u", "--unique", action="store_true",
+                        help="Reject puzzles without exactly one solution")
+    parser.add_argument("-p", "--parallel", action="store_true",
+                        help="Split the search for one puzzle across --jobs processes")
+    parser.add_argument("-c", "--cache",
+                        help="Solution cache file, keyed by canonical puzzle form")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Worker processes for --batch or --parallel "
+                             "(default: one per CPU)")
+    parser.add_argument('sdk_file', nargs='?', default=None,
+                        help="Puzzle to solve (default: data/easy.sdk)")
     args = parser.parse_args()
+    if args.parallel and args.engine != "search":
+        parser.error("--parallel splits the search engine; "
+                     f"it cannot be combined with --engine {args.engine}")
     return args
 
 
+def solve(board: sdk_board.Board, args: object):
+    """Solve with the engine chosen on the command line,
+    consulting and then updating the solution cache if one is given.
+    """
+    cache = sdk_canon.SolutionCache(path=args.cache) if args.cache else None
+    puzzle = board.as_list()
+    solution = cache.get(puzzle) if cache else None
+    if solution is not None:
+        log.debug("Solution found in cache")
+        for tile in board.cells:
+            if tile.value == UNKNOWN:
+                tile.set_value(solution[tile.row][tile.col])
+    elif args.parallel:
+        sdk_parallel.solve(board, workers=args.jobs)
+    else:
+        ENGINES[args.engine](board)
+    if cache:
+        if solution is None and board.is_complete():
+            cache.put(puzzle, board.as_list())
+        cache.close()
+
+
 def main():
     args = cli()
-    board = sdk_reader.read(args.sdk_file)
-    log.debug(f'Read initial board from {args.sdk_file.name}:\n{board}')
+    if args.batch:
+        sdk_batch.run(args.batch, args.engine, args.jobs)
+        return
+    sdk_file = args.sdk_file or 'data/easy.sdk'
+    board = sdk_reader.read(sdk_file)     # closes the file when done
+    log.debug(f'Read initial board from {sdk_file}:\n{board}')
     
     if args.display:
         the_display = sdk_display.Board(board, 800, 800)   
-    if board.is_consistent():
-        board.solve()
-    else:
+    if not board.is_consistent():
         print("Board has duplicates; rejected")
+    elif args.unique and not board.is_unique():
+        print("Board does not have a unique solution; rejected")
+    else:
+        solve(board, args)
         
     print('Final board:')
     print(board)
 
     if args.display:
+        the_display.render()    # Show the final state
         input("Press enter to shut down")
         the_display.close()
 
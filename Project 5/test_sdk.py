@@ -4,6 +4,25 @@ import unittest
 from sdk_board import *
 from sdk_config import *
 import sdk_reader
+import sdk_bitboard
+import sdk_dlx
+import sdk_batch
+import sdk_generate
+import sdk_bench
+import sdk_layout
+import sdk_parallel
+import sdk_canon
+try:
+    import sdk_numpy
+except ImportError:     # NumPy is optional
+    sdk_numpy = None
+import random
+import os
+import sys
+import tempfile
+import time
+import types
+from unittest import mock
 
 
 class TestTileBasic(unittest.TestCase):
@@ -227,11 +246,14 @@ class FinalVersion(unittest.TestCase):
         # First we have to remove others with naked_single
         sdk_board.naked_single()
         # Then we can make the choice.
-        tile = sdk_board.min_tile()
+        tile = sdk_board.min_choice_tile()
         self.assertEqual(tile.value, ".")
         self.assertEqual(tile.row, 4)
         self.assertEqual(tile.col, 4)
         self.assertEqual(tile.candidates, set(["6", "7"]))
+        # With no unknown tile left there is nothing to choose
+        sdk_board.solve()
+        self.assertIsNone(sdk_board.min_choice_tile())
 
 
     def test_save_restore(self):
@@ -258,6 +280,611 @@ class FinalVersion(unittest.TestCase):
                     "169472853", "758693124", "342581679"]
         self.assertEqual(sdk_board.as_list(), solution)
 
+class TestTactics(unittest.TestCase):
+    """Subset and intersection tactics, each on a board
+    where only that tactic applies.
+    """
+
+    def setUp(self):
+        self.board = Board()
+        self.tiles = self.board.tiles
+
+    def test_naked_pair(self):
+        self.tiles[0][0].remove_candidates(set("3456789"))
+        self.tiles[0][1].remove_candidates(set("3456789"))
+        self.assertTrue(self.board.naked_subset(2))
+        self.assertEqual(self.tiles[0][5].candidates, set("3456789"))
+        self.assertEqual(self.tiles[1][1].candidates, set("3456789"))
+        self.assertEqual(self.tiles[1][5].candidates, set(CHOICES))
+        self.assertFalse(self.board.naked_subset(2))
+
+    def test_hidden_pair(self):
+        for col in range(2, NCOLS):
+            self.tiles[0][col].remove_candidates({"1", "2"})
+        self.assertTrue(self.board.hidden_subset(2))
+        self.assertEqual(self.tiles[0][0].candidates, {"1", "2"})
+        self.assertEqual(self.tiles[0][1].candidates, {"1", "2"})
+
+    def test_pointing(self):
+        for row in range(1, ROOT):
+            for col in range(ROOT):
+                self.tiles[row][col].remove_candidates({"5"})
+        self.assertTrue(self.board.pointing())
+        self.assertFalse(self.tiles[0][6].could_be("5"))
+        self.assertTrue(self.tiles[1][6].could_be("5"))
+
+    def test_box_line(self):
+        for col in range(ROOT, NCOLS):
+            self.tiles[0][col].remove_candidates({"7"})
+        self.assertTrue(self.board.box_line())
+        self.assertFalse(self.tiles[1][1].could_be("7"))
+        self.assertTrue(self.tiles[0][1].could_be("7"))
+        self.assertTrue(self.tiles[4][1].could_be("7"))
+
+    def test_propagate_counts_tactics(self):
+        """From data/evil.sdk; propagation alone now solves it"""
+        self.board.set_tiles(["....5..1.", "2........", "5.19..48.",
+                              "6...1.24.", "8.......7", ".23.4...1",
+                              ".69..28.3", "........4", ".4..8...."])
+        self.board.propagate()
+        self.assertTrue(self.board.is_complete())
+        self.assertTrue(self.board.stats["naked_single"] > 0)
+        self.assertEqual(set(self.board.stats)
+                         - {"naked_single", "hidden_single", "propagations", "groups_examined"}
+                         - {name for name, tactic in self.board.tactics}, set())
+
+
+class TestBranching(unittest.TestCase):
+    """Minimum remaining values, degree and least constraining value"""
+
+    def test_index_tracks_candidates(self):
+        board = Board()
+        self.assertEqual(len(board.index.fewest()), NROWS * NCOLS)
+        board.tiles[0][0].remove_candidates(set("1234567"))
+        self.assertEqual(board.min_choice_tile(), board.tiles[0][0])
+        mark = len(board.trail)
+        board.tiles[0][0].set_value("8")
+        self.assertNotIn(board.tiles[0][0], board.index.fewest())
+        board.undo(mark)
+        self.assertEqual(board.min_choice_tile(), board.tiles[0][0])
+
+    def test_none_when_complete(self):
+        board = Board()
+        board.set_tiles(["534678912", "672195348", "198342567",
+                         "859761423", "426853791", "713924856",
+                         "961537284", "287419635", "345286179"])
+        self.assertIsNone(board.min_choice_tile())
+
+    def test_least_constraining_value(self):
+        board = Board()
+        tile = board.tiles[0][0]
+        tile.remove_candidates(set("1234567"))
+        board.tiles[0][8].remove_candidates({"9"})
+        self.assertEqual(board.ordered_candidates(tile), ["9", "8"])
+
+
+class TestWorkQueue(unittest.TestCase):
+    """Propagation should only revisit groups of changed tiles"""
+
+    def test_change_queues_own_groups(self):
+        board = Board()
+        board.propagate()
+        self.assertEqual(len(board.queue), 0)
+        board.tiles[4][4].set_value("5")
+        self.assertEqual(len(board.queue), 3)
+        board.propagate()
+        self.assertEqual(len(board.queue), 0)
+        self.assertFalse(board.tiles[4][0].could_be("5"))
+        self.assertTrue(board.tiles[0][0].could_be("5"))
+
+    def test_known_tiles_keep_their_candidate(self):
+        board = Board()
+        board.set_tiles(["123456789", ".........", ".........",
+                         ".........", ".........", ".........",
+                         ".........", ".........", "........."])
+        board.propagate()
+        for tile in board.tiles[0]:
+            self.assertEqual(tile.candidates, {tile.value})
+        # A fully known row has nothing to eliminate, so no trail
+        # entries, queued groups or progress
+        mark = len(board.trail)
+        self.assertFalse(board._naked_single_group(board.lines[0]))
+        self.assertEqual(len(board.trail), mark)
+        self.assertEqual(len(board.queue), 0)
+
+
+class TestTrail(unittest.TestCase):
+    """Undoing a guess should restore values and candidates exactly"""
+
+    def test_undo_guess(self):
+        board = Board()
+        board.set_tiles(["123456789", ".........", "......1..",
+                         ".........", ".........", ".........",
+                         ".........", ".........", "........."])
+        board.propagate()
+        before = [[(tile.value, set(tile.candidates)) for tile in row]
+                  for row in board.tiles]
+        mark = len(board.trail)
+        guess = next(tile for row in board.tiles for tile in row
+                     if tile.value == UNKNOWN)
+        guess.set_value(min(guess.candidates))
+        board.propagate()
+        board.undo(mark)
+        after = [[(tile.value, tile.candidates) for tile in row]
+                 for row in board.tiles]
+        self.assertEqual(before, after)
+        self.assertEqual(len(board.trail), mark)
+
+
+class TestDLX(unittest.TestCase):
+    """Dancing Links engine"""
+
+    def test_guess_check(self):
+        """From data/evil.sdk"""
+        board = Board()
+        board.set_tiles(["....5..1.", "2........", "5.19..48.",
+                         "6...1.24.", "8.......7", ".23.4...1",
+                         ".69..28.3", "........4", ".4..8...."])
+        self.assertEqual(sdk_dlx.count_solutions(board, limit=2), 1)
+        self.assertTrue(sdk_dlx.solve(board))
+        solution = ["497856312", "286134795", "531927486",
+                    "675319248", "814265937", "923748561",
+                    "169472853", "758693124", "342581679"]
+        self.assertEqual(board.as_list(), solution)
+
+    def test_count_ambiguous(self):
+        board = Board()
+        board.set_tiles(["534678912", "672195348", "198342567",
+                         "859761423", "426853791", "713924856",
+                         "961537284", "287419635", "3452861.."])
+        self.assertEqual(sdk_dlx.count_solutions(board), 1)
+        self.assertEqual(sdk_dlx.count_solutions(Board(), limit=5), 5)
+
+    def test_conflict(self):
+        board = Board()
+        board.set_tiles([".........", ".........", ".........",
+                         ".........", ".2.....2.", ".........",
+                         ".........", ".........", "........."])
+        self.assertEqual(sdk_dlx.count_solutions(board), 0)
+        self.assertFalse(sdk_dlx.solve(board))
+
+
+class TestBatch(unittest.TestCase):
+    """Batch solving from a one-puzzle-per-line file"""
+
+    def test_solve_all_in_order(self):
+        lines = ["# two puzzles",
+                 "....5..1.2........5.19..48.6...1.24.8.......7.23.4...1.69..28.3........4.4..8....",
+                 "",
+                 "......12.24..1....9.1..4...4....365.....9.....364....1...1..5.6....5..43.72......"]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "puzzles.txt")
+            with open(path, "w") as f:
+                f.write("\n".join(lines))
+            results = list(sdk_batch.solve_all(path, "bits", workers=2))
+        self.assertEqual([r.name for r in results], [f"{path}:1", f"{path}:2"])
+        self.assertTrue(all(r.solved for r in results))
+        self.assertEqual(results[1].solution[0], "687539124")
+
+
+class TestStreamingIO(unittest.TestCase):
+    """Multi-puzzle reading and writing"""
+
+    PUZZLES = [["....5..1.", "2........", "5.19..48.",
+                "6...1.24.", "8.......7", ".23.4...1",
+                ".69..28.3", "........4", ".4..8...."],
+               ["......12.", "24..1....", "9.1..4...",
+                "4....365.", "....9....", ".364....1",
+                "...1..5.6", "....5..43", ".72......"]]
+
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, compact in [("p.txt", True), ("p.sdk.gz", False), ("p.txt.gz", True)]:
+                path = os.path.join(tmp, name)
+                self.assertEqual(sdk_reader.write(self.PUZZLES, path, compact), 2)
+                self.assertEqual(list(sdk_reader.iter_puzzles(path)), self.PUZZLES)
+            boards = list(sdk_reader.iter_boards(path))
+            self.assertEqual([b.as_list() for b in boards], self.PUZZLES)
+
+    def test_short_block(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bad.sdk")
+            with open(path, "w") as f:
+                f.write("\n".join(self.PUZZLES[0][:5]) + "\n\n")
+            with self.assertRaises(sdk_reader.InputError):
+                list(sdk_reader.iter_puzzles(path))
+
+
+class CountingObserver(TileObserver):
+    def __init__(self):
+        super().__init__()
+        self.events = []
+
+    def notify(self, event: TileEvent):
+        self.events.append(event)
+
+
+class TestEvents(unittest.TestCase):
+    """Tile notifications are skipped when headless and
+    coalesced during propagation.
+    """
+
+    def test_one_event_per_resolved_tile(self):
+        tile = Tile(0, 0)
+        observer = CountingObserver()
+        tile.add_observer(observer)
+        tile.remove_candidates(set("12345678"))
+        self.assertEqual(tile.value, "9")
+        self.assertEqual(len(observer.events), 1)
+
+    def test_propagate_coalesces(self):
+        board = Board()
+        board.set_tiles(["......12.", "24..1....", "9.1..4...",
+                         "4....365.", "....9....", ".364....1",
+                         "...1..5.6", "....5..43", ".72......"])
+        observer = CountingObserver()
+        for row in board.tiles:
+            for tile in row:
+                tile.add_observer(observer)
+        board.propagate()
+        tiles = [event.tile for event in observer.events]
+        self.assertEqual(len(tiles), len(set(tiles)))
+
+
+class StubGrid(object):
+    """Stands in for graphics.grid.Grid, counting drawing calls"""
+
+    def __init__(self):
+        self.fills = []
+        self.frames = 0
+        self.on_update = None
+        self.closed = False
+
+    def sub_grid_dim(self, rows, cols):
+        pass
+
+    def fill_cell(self, row, col, color):
+        self.fills.append((row, col))
+
+    def label_cell(self, row, col, label):
+        pass
+
+    def sub_label_cell(self, row, col, i, j, label):
+        pass
+
+    def update(self):
+        self.frames += 1
+        if self.on_update is not None:
+            self.on_update()
+
+    def close(self):
+        self.closed = True
+
+
+def import_display():
+    """sdk_display, importable without the graphics package
+    (only the stub grid is used)
+    """
+    try:
+        import sdk_display
+        return sdk_display
+    except ImportError:
+        pass
+    graphics = types.ModuleType("graphics")
+    graphics.grid = types.ModuleType("graphics.grid")
+    graphics.grid.Grid = StubGrid
+    graphics.graphics = types.ModuleType("graphics.graphics")
+    stubs = {"graphics": graphics, "graphics.grid": graphics.grid,
+             "graphics.graphics": graphics.graphics}
+    with mock.patch.dict(sys.modules, stubs):
+        import sdk_display
+    return sdk_display
+
+
+class TestDisplayFrames(unittest.TestCase):
+    """Tile changes mark views dirty; once FRAME_DELAY has passed,
+    the next change redraws the dirty tiles and shows the frame.
+    """
+
+    def setUp(self):
+        self.display = import_display()
+        self.now = 0.0
+        self.grid = StubGrid()
+        self.board = Board()
+        self.view = self.display.Board(self.board, 800, 800, grid=self.grid,
+                                       clock=lambda: self.now)
+        self.grid.fills.clear()     # the initial drawing
+
+    def test_changes_wait_for_frame(self):
+        tile = self.board.tiles[0][0]
+        tile.remove_candidates(set("1234"))
+        tile.remove_candidates(set("5678"))
+        self.assertEqual((self.grid.fills, self.grid.frames), ([], 0))
+        self.now += FRAME_DELAY
+        self.board.tiles[8][8].set_value("3")
+        self.assertEqual(sorted(self.grid.fills), [(0, 0), (8, 8)])
+        self.assertEqual(self.grid.frames, 1)
+        # The next frame is not due yet
+        self.board.tiles[8][7].set_value("4")
+        self.assertEqual((len(self.grid.fills), self.grid.frames), (2, 1))
+
+    def test_frames_while_solving(self):
+        """Frames are drawn during the solve, not just at the end"""
+        progress = []
+        self.grid.on_update = lambda: progress.append(self.board.is_complete())
+
+        def tick():
+            self.now += FRAME_DELAY / 4
+            return self.now
+        self.view.clock = tick
+        self.board.set_tiles(TestCanon.PUZZLE)
+        self.assertTrue(self.board.solve())
+        self.assertIn(False, progress)
+        self.assertGreater(self.grid.frames, 1)
+
+    def test_close_shows_final_state(self):
+        self.board.tiles[4][4].set_value("5")
+        self.view.close()
+        self.assertEqual(self.grid.fills, [(4, 4)])
+        self.assertEqual(self.grid.frames, 1)
+        self.assertTrue(self.grid.closed)
+
+
+class TestGenerate(unittest.TestCase):
+    """Generated puzzles are unique; ratings follow the solver's work"""
+
+    def test_unique(self):
+        rows = sdk_generate.generate(random.Random(211))
+        board = Board()
+        board.set_tiles(rows)
+        self.assertEqual(sdk_dlx.count_solutions(board, limit=2), 1)
+
+    def test_rate_easy(self):
+        rating = sdk_generate.rate(["...26.7.1", "68..7..9.", "19...45..",
+                                    "82.1...4.", "..46.29..", ".5...3.28",
+                                    "..93...74", ".4..5..36", "7.3.18..."])
+        self.assertEqual(rating.level, "easy")
+        self.assertNotIn("guesses", rating.stats)
+
+    def test_rate_expert(self):
+        rating = sdk_generate.rate(["8........", "..36.....", ".7..9.2..",
+                                    ".5...7...", "....457..", "...1...3.",
+                                    "..1....68", "..85...1.", ".9....4.."])
+        self.assertEqual(rating.level, "expert")
+        self.assertGreater(rating.stats["guesses"], 0)
+
+
+class TestBench(unittest.TestCase):
+    """Benchmark summaries"""
+
+    def test_percentile(self):
+        values = [float(v) for v in range(1, 101)]
+        self.assertEqual(sdk_bench.percentile(values, 0.50), 50.0)
+        self.assertEqual(sdk_bench.percentile(values, 0.99), 99.0)
+        self.assertEqual(sdk_bench.percentile([], 0.5), 0.0)
+
+    def test_bench_corpus(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "corpus.txt")
+            sdk_reader.write(TestStreamingIO.PUZZLES, path)
+            result = sdk_bench.bench_corpus(path)
+        self.assertEqual(result["puzzles"], 2)
+        self.assertEqual(result["solved"], 2)
+        self.assertGreater(result["eliminated_per_puzzle"], 0)
+        self.assertEqual(sdk_bench.regressions({"corpora": {"c": result}},
+                                               {"corpora": {"c": result}}, 0.1), [])
+
+
+class TestLayout(unittest.TestCase):
+    """Cached flat geometry tables for any ROOT"""
+
+    def test_tables(self):
+        for root in (2, 3, 4, 5):
+            layout = sdk_layout.layout(root)
+            size = root * root
+            self.assertIs(layout, sdk_layout.layout(root))
+            self.assertEqual(len(layout.groups), 3 * size)
+            self.assertEqual(len(layout.peers[0]), 3 * size - 2 * root - 1)
+            for cell in range(layout.ncells):
+                for group_id in layout.cell_groups[cell]:
+                    self.assertIn(cell, layout.groups[group_id])
+
+    def test_board_uses_layout(self):
+        board = Board()
+        tile = board.tiles[4][7]
+        self.assertEqual(board.cells[tile.cell], tile)
+        self.assertEqual(len(board.peers(tile)), 20)
+        self.assertNotIn(tile, board.peers(tile))
+
+    def test_large_bitboards(self):
+        for root in (4, 5):
+            board = sdk_bitboard.BitBoard(root=root)
+            self.assertTrue(board.solve())
+            rows = board.as_list()
+            self.assertEqual(sdk_bitboard.BitBoard.from_list(rows, root).as_list(), rows)
+
+
+@unittest.skipIf(sdk_numpy is None, "NumPy not installed")
+class TestNumpy(unittest.TestCase):
+    """Vectorized checks agree with Board"""
+
+    COMPLETE = ["534678912", "672195348", "198342567",
+                "859761423", "426853791", "713924856",
+                "961537284", "287419635", "345286179"]
+
+    def test_single_board(self):
+        grid = sdk_numpy.to_array(self.COMPLETE)
+        self.assertTrue(sdk_numpy.is_consistent(grid))
+        self.assertTrue(sdk_numpy.is_complete(grid))
+        self.assertEqual(sdk_numpy.as_list(grid), self.COMPLETE)
+        self.assertFalse(sdk_numpy.is_consistent(sdk_numpy.to_array(
+            [".........", "......1..", "........1", ".........", ".........",
+             ".........", ".........", ".........", "........."])))
+
+    def test_candidate_counts(self):
+        board = Board()
+        board.set_tiles(["....5....", "....4....", ".........",
+                         ".........", "123....89", ".........",
+                         ".........", ".........", "........."])
+        counts = sdk_numpy.candidate_counts(sdk_numpy.to_array(board))
+        board.naked_single()
+        for tile in board.cells:
+            self.assertEqual(counts[tile.row, tile.col],
+                             len(tile.candidates) if tile.value == UNKNOWN else 1)
+
+    def test_validate_many(self):
+        complete = "".join(self.COMPLETE)
+        bad_row = complete[:9] + complete[10] + complete[10:]
+        partial = "." + complete[1:]
+        consistent, done = sdk_numpy.validate_many(
+            sdk_numpy.stack([complete, bad_row, partial] * 1000))
+        self.assertEqual(consistent[:3].tolist(), [True, False, True])
+        self.assertEqual(done[:3].tolist(), [True, False, False])
+        self.assertEqual(int(done.sum()), 1000)
+
+
+class TestCountSolutions(unittest.TestCase):
+    """Counting solutions with the propagation engine"""
+
+    def test_unique(self):
+        """From data/evil.sdk"""
+        board = Board()
+        rows = ["....5..1.", "2........", "5.19..48.",
+                "6...1.24.", "8.......7", ".23.4...1",
+                ".69..28.3", "........4", ".4..8...."]
+        board.set_tiles(rows)
+        self.assertEqual(board.count_solutions(), 1)
+        self.assertTrue(board.is_unique())
+        self.assertEqual(board.as_list(), rows)
+        self.assertTrue(board.solve())
+
+    def test_limit(self):
+        board = Board()
+        self.assertEqual(board.count_solutions(limit=3), 3)
+        self.assertFalse(board.is_unique())
+        board.set_tiles([".........", ".........", ".........",
+                         ".........", ".2.....2.", ".........",
+                         ".........", ".........", "........."])
+        self.assertEqual(board.count_solutions(limit=2), 0)
+
+    def test_matches_dlx(self):
+        for seed in range(3):
+            rows = sdk_generate.generate(random.Random(seed))
+            rows[0] = UNKNOWN * NCOLS
+            board = Board()
+            board.set_tiles(rows)
+            self.assertEqual(board.count_solutions(limit=50),
+                             sdk_dlx.count_solutions(board, limit=50))
+
+
+class TestParallel(unittest.TestCase):
+    """Splitting one search across processes"""
+
+    HARD = ["8........", "..36.....", ".7..9.2..",
+            ".5...7...", "....457..", "...1...3.",
+            "..1....68", "..85...1.", ".9....4.."]
+
+    def test_split(self):
+        solution, parts = sdk_parallel.split(self.HARD, 2)
+        self.assertIsNone(solution)
+        self.assertGreater(len(parts), 1)
+        for part in parts:
+            for row, given in zip(part, self.HARD):
+                for value, clue in zip(row, given):
+                    self.assertIn(clue, (UNKNOWN, value))
+
+    def test_solve(self):
+        board = Board()
+        board.set_tiles(self.HARD)
+        self.assertTrue(sdk_parallel.solve(board, workers=2))
+        self.assertTrue(board.is_complete())
+        self.assertEqual(board.as_list()[0], "812753649")
+
+    def test_should_stop(self):
+        board = Board()
+        board.set_tiles(self.HARD)
+        board.should_stop = lambda: True
+        self.assertFalse(board.solve())
+
+
+class TestCanon(unittest.TestCase):
+    """Canonical forms and the solution cache"""
+
+    PUZZLE = ["....5..1.", "2........", "5.19..48.",
+              "6...1.24.", "8.......7", ".23.4...1",
+              ".69..28.3", "........4", ".4..8...."]
+    SOLUTION = ["497856312", "286134795", "531927486",
+                "675319248", "814265937", "923748561",
+                "169472853", "758693124", "342581679"]
+    # Transpose, swap rows in the first band, reorder one stack, relabel
+    VARIANT = sdk_canon.Transform(True, (1, 0, 2, 3, 4, 5, 6, 7, 8),
+                                  (0, 1, 2, 5, 3, 4, 6, 7, 8),
+                                  dict(zip("123456789", "918273645")))
+
+    def test_invariant(self):
+        variant = sdk_canon.apply(self.VARIANT, self.PUZZLE)
+        self.assertNotEqual(variant, self.PUZZLE)
+        form, transform = sdk_canon.canonical(self.PUZZLE)
+        self.assertEqual(sdk_canon.canonical(variant)[0], form)
+        self.assertEqual(sdk_canon.invert(transform, form), self.PUZZLE)
+
+    def test_sparse_is_fast(self):
+        """Almost every order ties on a sparse grid; tied states that
+        finish alike should be merged rather than all kept"""
+        for rows in (["." * NCOLS] * NROWS, ["5" + "." * (NCOLS - 1)] + ["." * NCOLS] * (NROWS - 1)):
+            start = time.perf_counter()
+            form, transform = sdk_canon.canonical(rows)
+            self.assertLess(time.perf_counter() - start, 0.25)
+            self.assertEqual(sdk_canon.invert(transform, form), rows)
+        # Dots sort first, so the clue goes last in its band and stack
+        self.assertEqual(form[2], "..1......")
+
+    def test_cache_maps_back(self):
+        cache = sdk_canon.SolutionCache(capacity=4)
+        cache.put(self.PUZZLE, self.SOLUTION)
+        variant = sdk_canon.apply(self.VARIANT, self.PUZZLE)
+        self.assertEqual(cache.get(variant), sdk_canon.apply(self.VARIANT, self.SOLUTION))
+        self.assertIsNone(cache.get(TestParallel.HARD))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_disk(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache")
+            cache = sdk_canon.SolutionCache(path=path)
+            cache.put(self.PUZZLE, self.SOLUTION)
+            cache.close()
+            cache = sdk_canon.SolutionCache(path=path)
+            self.assertEqual(cache.get(self.PUZZLE), self.SOLUTION)
+            cache.close()
+
+
+class TestBitBoard(unittest.TestCase):
+    """The bitmask engine should agree with the Tile/Board solver"""
+
+    def test_bit_helpers(self):
+        self.assertEqual(sdk_bitboard.popcount(0b101101), 4)
+        self.assertEqual(sdk_bitboard.lowest_bit(0b101100), 0b100)
+        self.assertEqual(list(sdk_bitboard.bits(0b1010)), [0b10, 0b1000])
+
+    def test_guess_check(self):
+        """From data/evil.sdk"""
+        board = Board()
+        board.set_tiles(["....5..1.", "2........", "5.19..48.",
+                         "6...1.24.", "8.......7", ".23.4...1",
+                         ".69..28.3", "........4", ".4..8...."])
+        self.assertTrue(sdk_bitboard.solve(board))
+        solution = ["497856312", "286134795", "531927486",
+                    "675319248", "814265937", "923748561",
+                    "169472853", "758693124", "342581679"]
+        self.assertEqual(board.as_list(), solution)
+
+    def test_duplicate_rejected(self):
+        board = Board()
+        board.set_tiles(["1........", ".........", ".........",
+                         ".........", ".........", ".........",
+                         "1........", ".........", "........."])
+        self.assertFalse(sdk_bitboard.solve(board))
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file